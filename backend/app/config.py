@@ -12,8 +12,14 @@ class Settings:
     # Database URL (SQLite by default, but can be swapped to Postgres/MySQL easily)
     DATABASE_URL: str = os.getenv("DATABASE_URL", "sqlite:///./neurodetect.db")
 
-    # CORS origins (restrict in production)
-    ALLOWED_ORIGINS: list = ["*"]
+    # React dev server by default; ALLOWED_ORIGINS takes a comma-separated list
+    FRONTEND_URL: str = os.getenv("FRONTEND_URL", "http://localhost:3000")
+
+    # CORS origins (explicit list, so browsers can cache preflight responses)
+    ALLOWED_ORIGINS: list = os.getenv("ALLOWED_ORIGINS", FRONTEND_URL).split(",")
+
+    # Optional Redis for response caching (e.g. redis://localhost:6379/0); empty disables it
+    REDIS_URL: str = os.getenv("REDIS_URL", "")
 
 settings = Settings()
 
@@ -1,5 +1,6 @@
 # backend/app/db.py
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 
@@ -12,4 +13,14 @@ engine = create_engine(
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Same database through the aiosqlite driver, for endpoints that await their
+# queries instead of blocking the event loop
+ASYNC_DATABASE_URL = "sqlite+aiosqlite:///./neurodetect.db"
+
+async_engine = create_async_engine(ASYNC_DATABASE_URL)
+
+# expire_on_commit=False: endpoints return (and serialize) objects after commit,
+# which must not trigger implicit IO on an AsyncSession
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
 Base = declarative_base()
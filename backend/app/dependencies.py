@@ -1,5 +1,17 @@
 # backend/app/dependencies.py
-from app.db import SessionLocal
+from typing import Optional
+from app.config import settings
+from app.db import SessionLocal, AsyncSessionLocal
+
+# Redis is optional: without the client library or REDIS_URL, caching is skipped
+try:
+    import redis.asyncio as aioredis
+    REDIS_AVAILABLE = True
+except ImportError:
+    aioredis = None
+    REDIS_AVAILABLE = False
+
+_redis_client = None
 
 def get_db():
     db = SessionLocal()
@@ -7,3 +19,14 @@ def get_db():
         yield db
     finally:
         db.close()
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+def get_redis() -> Optional["aioredis.Redis"]:
+    """Shared async Redis client (lazily created), or None when Redis is not configured."""
+    global _redis_client
+    if _redis_client is None and REDIS_AVAILABLE and settings.REDIS_URL:
+        _redis_client = aioredis.from_url(settings.REDIS_URL, decode_responses=True)
+    return _redis_client
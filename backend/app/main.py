@@ -1,8 +1,26 @@
 # backend/app/main.py
 
+import os
+
+# ✅ One BLAS/OpenMP thread per request - must be set before numpy/sklearn load,
+# concurrency comes from the worker threadpool sized in lifespan() instead
+BLAS_NUM_THREADS = int(os.getenv("BLAS_NUM_THREADS", "1"))
+for _var in ("OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS"):
+    os.environ.setdefault(_var, str(BLAS_NUM_THREADS))
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+import anyio.to_thread
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from app.db import Base, engine
+from app.config import settings
+from app.db import Base, engine, async_engine
+from app.dependencies import get_redis
+from app.services.training_service import training_service
+from app.services.batching import prediction_batcher
 from app.routes import (
     analysis_routes,
     patients_routes,
@@ -12,19 +30,58 @@ from app.routes import (
     eeg_routes
 )
 
-# ✅ Create DB tables at startup
-Base.metadata.create_all(bind=engine)
+# ✅ Startup/shutdown hooks (run once the worker is serving, not at import time)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Create DB tables at startup, plus any indexes added to existing tables
+    # since (create_all skips tables that already exist)
+    Base.metadata.create_all(bind=engine)
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
+
+    # Bound worker threads to the cores left after BLAS threads, instead of
+    # AnyIO's default 40, so concurrent QDA/SMOTE calls don't oversubscribe CPUs.
+    # Sync endpoints/run_in_threadpool use AnyIO's limiter, run_in_executor the loop's.
+    worker_threads = max(1, (os.cpu_count() or 1) // BLAS_NUM_THREADS)
+    executor = ThreadPoolExecutor(max_workers=worker_threads)
+    asyncio.get_running_loop().set_default_executor(executor)
+    anyio.to_thread.current_default_thread_limiter().total_tokens = worker_threads
+
+    # Load QDA/TabNet once per worker, off the event loop (torch init is slow),
+    # so requests reuse the in-memory models
+    await run_in_threadpool(training_service.load)
+
+    # Coalesce concurrent single-file analyses into batched predictions
+    prediction_batcher.start()
+
+    yield
+
+    await prediction_batcher.stop()
+    executor.shutdown(wait=False)
+    await async_engine.dispose()
+    redis = get_redis()
+    if redis is not None:
+        await redis.aclose()
 
 # ✅ Initialize FastAPI app
-app = FastAPI(title="NeuroDetect API", version="1.0.0")
+# orjson encodes the float-heavy prediction payloads much faster than stdlib json
+app = FastAPI(
+    title=settings.PROJECT_NAME,
+    version=settings.VERSION,
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse,
+)
 
 # ✅ CORS setup (allow React frontend to connect)
+# Concrete origins/methods/headers (no "*") let browsers cache preflights for a day
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["*"],  # in production restrict to your frontend URL
+    allow_origins=settings.ALLOWED_ORIGINS,
     allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+    allow_methods=["GET", "POST"],
+    allow_headers=["Authorization", "Content-Type"],
+    max_age=86400,
 )
 
 # ✅ Register API routers
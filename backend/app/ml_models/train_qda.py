@@ -5,16 +5,50 @@ Optimized for 178-feature format with Normal, Seizure, and Neurodegeneration cla
 
 import numpy as np
 import pandas as pd
-import pickle
 import os
+import hashlib
+import joblib
 from sklearn.discriminant_analysis import QuadraticDiscriminantAnalysis
 from sklearn.preprocessing import StandardScaler, LabelEncoder
-from sklearn.model_selection import train_test_split, GridSearchCV
+from sklearn.model_selection import train_test_split, StratifiedKFold
 from sklearn.metrics import classification_report, confusion_matrix, accuracy_score
-from imblearn.over_sampling import SMOTE
 import warnings
 warnings.filterwarnings('ignore')
 
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pv
+    import pyarrow.parquet as pq
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+def parquet_path_for(csv_path):
+    """Path of the Parquet copy kept next to a CSV dataset"""
+    return os.path.splitext(csv_path)[0] + '.parquet'
+
+def convert_csv_to_parquet(csv_path):
+    """
+    Write an LZ4-compressed Parquet copy of the CSV next to it.
+    
+    Parquet is typed and columnar, so later loads skip text parsing and dtype
+    inference entirely. The copy is only (re)written when it is missing or
+    older than the CSV. Returns the Parquet path, or None without pyarrow.
+    """
+    if not PYARROW_AVAILABLE:
+        return None
+    parquet_path = parquet_path_for(csv_path)
+    if os.path.exists(parquet_path) and os.path.getmtime(parquet_path) >= os.path.getmtime(csv_path):
+        return parquet_path
+    
+    print(f"Converting {csv_path} to Parquet...")
+    table = pv.read_csv(csv_path, read_options=pv.ReadOptions(use_threads=True, block_size=1 << 20))
+    tmp_path = parquet_path + '.tmp'
+    pq.write_table(table, tmp_path, compression='lz4')
+    os.replace(tmp_path, parquet_path)
+    print(f"Parquet copy saved to {parquet_path}")
+    return parquet_path
+
 class DataLoader:
     """Data loader for 178-feature EEG CSV format"""
     
@@ -22,54 +56,180 @@ class DataLoader:
         self.scaler = StandardScaler()
         self.label_encoder = LabelEncoder()
     
-    def load_eeg_data(self, filepath):
-        """Load 3-class EEG dataset directly"""
-        print(f"Loading EEG dataset from {filepath}...")
-        df = pd.read_csv(filepath)
+    def _read_csv_pandas(self, filepath):
+        """Parse the CSV with pandas into a float32 feature matrix and labels"""
+        # Drop the 'Unnamed: 0' index column at parse time so it is never materialized;
+        # labels are small class ids, so parse them straight to (nullable) int8
+        df = pd.read_csv(filepath, usecols=lambda col: col != 'Unnamed: 0', dtype={'y': 'Int8'})
         
         print(f"Raw dataset shape: {df.shape}")
         print(f"Columns: {df.columns.tolist()[:5]}... (showing first 5)")
         
-        # Check if there's an unnamed index column
-        if 'Unnamed: 0' in df.columns:
-            print("Removing 'Unnamed: 0' index column...")
-            df = df.drop(columns=['Unnamed: 0'])
-        
         # Separate features and labels
         # Last column should be 'y' (label)
-        if 'y' in df.columns:
-            X = df.drop(columns=['y']).values
-            y = df['y'].values
-            feature_names = df.drop(columns=['y']).columns.tolist()
-        else:
-            # Assume last column is label
-            X = df.iloc[:, :-1].values
-            y = df.iloc[:, -1].values
-            feature_names = df.columns[:-1].tolist()
+        label_column = 'y' if 'y' in df.columns else df.columns[-1]
+        y = df.pop(label_column)
+        feature_names = df.columns.tolist()
         
         # Convert to numeric, forcing any non-numeric to NaN
+        # (only columns pandas could not parse as numbers need coercion)
+        print("\nConverting data to numeric format...")
+        for column in df.columns[df.dtypes == object]:
+            df[column] = pd.to_numeric(df[column], errors='coerce')
+        X = df.to_numpy(dtype=np.float32)
+        
+        return X, y, feature_names
+    
+    def _read_csv_arrow(self, filepath):
+        """Parse the CSV with pyarrow's multithreaded reader"""
+        table = pv.read_csv(
+            filepath,
+            read_options=pv.ReadOptions(use_threads=True, block_size=1 << 20),
+            convert_options=pv.ConvertOptions(column_types={'y': pa.int8()})
+        )
+        return self._read_arrow_table(table)
+    
+    def _read_parquet(self, filepath):
+        """Read the Parquet copy of the dataset (no text parsing needed)"""
+        return self._read_arrow_table(pq.read_table(filepath))
+    
+    def _read_arrow_table(self, table):
+        """Split an Arrow table into a float32 feature matrix and labels"""
+        if 'Unnamed: 0' in table.column_names:
+            table = table.drop(['Unnamed: 0'])
+        
+        print(f"Raw dataset shape: {(table.num_rows, table.num_columns)}")
+        print(f"Columns: {table.column_names[:5]}... (showing first 5)")
+        
+        # Separate features and labels
+        # Last column should be 'y' (label)
+        label_column = 'y' if 'y' in table.column_names else table.column_names[-1]
+        y = table.column(label_column).to_pandas()
+        feature_names = [name for name in table.column_names if name != label_column]
+        
+        # Numeric columns are copied straight from their Arrow buffers into the
+        # float32 matrix; only non-numeric (e.g. ID string) columns need coercion
         print("\nConverting data to numeric format...")
-        X = pd.DataFrame(X).apply(pd.to_numeric, errors='coerce').values
-        y = pd.Series(y).apply(pd.to_numeric, errors='coerce').values
+        X = np.empty((table.num_rows, len(feature_names)), dtype=np.float32)
+        for j, name in enumerate(feature_names):
+            column = table.column(name)
+            if pa.types.is_integer(column.type) or pa.types.is_floating(column.type):
+                X[:, j] = column.to_numpy()
+            else:
+                X[:, j] = pd.to_numeric(column.to_pandas(), errors='coerce')
+        
+        return X, y, feature_names
+    
+    def load_eeg_data(self, filepath):
+        """Load 3-class EEG dataset directly"""
+        parquet_path = parquet_path_for(filepath)
+        if (PYARROW_AVAILABLE and os.path.exists(parquet_path)
+                and os.path.getmtime(parquet_path) >= os.path.getmtime(filepath)):
+            print(f"Loading EEG dataset from {parquet_path}...")
+            X, y, feature_names = self._read_parquet(parquet_path)
+        elif PYARROW_AVAILABLE:
+            print(f"Loading EEG dataset from {filepath}...")
+            X, y, feature_names = self._read_csv_arrow(filepath)
+        else:
+            print(f"Loading EEG dataset from {filepath}...")
+            X, y, feature_names = self._read_csv_pandas(filepath)
         
         # Handle any NaN values created during conversion
         if np.any(np.isnan(X)):
             print(f"Warning: Found {np.sum(np.isnan(X))} NaN values after conversion, filling with 0")
             X = np.nan_to_num(X, nan=0.0)
         
-        if np.any(np.isnan(y)):
-            print(f"Warning: Found {np.sum(np.isnan(y))} NaN labels, this is a data quality issue!")
-            y = np.nan_to_num(y, nan=0)
+        # Missing or negative labels are a data quality issue - fail loudly
+        # instead of silently relabelling those rows as class 0
+        label_column = y.name
+        n_missing = int(pd.isna(y).sum())
+        if n_missing:
+            raise ValueError(f"Found {n_missing} missing labels in column '{label_column}'")
+        y = y.to_numpy(dtype=np.int8)
+        if y.min() < 0:
+            raise ValueError(f"Found negative labels in column '{label_column}'")
         
         print(f"\nFinal dataset shape: {X.shape}")
         print(f"Number of features: {X.shape[1]}")
-        print(f"Classes: {np.unique(y)}")
+        class_ids, class_counts = np.unique(y, return_counts=True)
+        print(f"Classes: {class_ids}")
         print(f"\nClass distribution:")
-        for class_id, count in pd.Series(y).value_counts().sort_index().items():
+        for class_id, count in zip(class_ids, class_counts):
             class_name = {0: 'Normal', 1: 'Seizure', 2: 'Neurodegeneration'}.get(int(class_id), 'Unknown')
             print(f"  Class {int(class_id)} ({class_name}): {count} samples")
         
-        return X, y.astype(int), feature_names
+        return X, y, feature_names
+
+def qda_reg_param_scores(X_train, y_train, X_val, y_val, reg_params):
+    """
+    Validation accuracy of QDA for every reg_param, from one SVD per class.
+    
+    QuadraticDiscriminantAnalysis only uses reg_param to shrink the singular
+    values of each class (S2 <- (1 - reg_param) * S2 + reg_param); means,
+    priors and rotations do not depend on it. So the decomposition is done
+    once and each candidate costs a rescale of the projected validation set
+    instead of a full refit.
+    """
+    reg = np.asarray(reg_params, dtype=np.float64)[:, None]
+    classes = np.unique(y_train)
+    log_posterior = np.empty((len(reg), len(X_val), len(classes)))
+    
+    with np.errstate(divide='ignore', invalid='ignore'):
+        for k, label in enumerate(classes):
+            Xg = X_train[y_train == label]
+            mean = Xg.mean(0)
+            _, S, Vt = np.linalg.svd(Xg - mean, full_matrices=False)
+            S2 = (S ** 2) / (len(Xg) - 1)
+            scalings = (1 - reg) * S2 + reg                     # (n_reg, rank)
+            Z2 = np.square((X_val - mean) @ Vt.T)               # (n_val, rank)
+            norm2 = Z2 @ (1.0 / scalings).T                     # (n_val, n_reg)
+            log_det = np.log(scalings).sum(axis=1)              # (n_reg,)
+            log_prior = np.log(len(Xg) / len(X_train))
+            log_posterior[:, :, k] = (-0.5 * (norm2 + log_det)).T + log_prior
+    
+    predictions = classes[log_posterior.argmax(axis=2)]
+    return (predictions == np.asarray(y_val)).mean(axis=1)
+
+def file_sha256(filepath, chunk_size=1 << 20):
+    """Hex SHA-256 of a file, read in 1 MiB chunks"""
+    digest = hashlib.sha256()
+    with open(filepath, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def qda_scoring_kernel(model):
+    """
+    Stacked float32 arrays for scoring a fitted QDA in one batched matmul.
+    
+    Same layout as EnhancedQDAModel._build_kernel: whitening matrices
+    rotation * sqrt(1/scalings) per class, class means, the constant
+    -0.5 * log-det + log-prior offset and their single-GEMM form
+    (whiten_all, shift). Saved with the model so serving
+    workers memory-map them instead of each rebuilding a private copy.
+    """
+    n_features = model.means_.shape[1]
+    rank = max(r.shape[1] for r in model.rotations_)
+    n_classes = len(model.classes_)
+    
+    whiten = np.zeros((n_classes, n_features, rank), dtype=np.float32)
+    log_det = np.empty(n_classes, dtype=np.float32)
+    for k, (R, S) in enumerate(zip(model.rotations_, model.scalings_)):
+        whiten[k, :, :R.shape[1]] = R * np.sqrt(1.0 / S)
+        log_det[k] = np.sum(np.log(S))
+    
+    # Single-GEMM form: x @ W_k - mu_k @ W_k for all classes side by side
+    means = model.means_.astype(np.float32)[:, None, :]
+    shift = np.einsum('kf,kfr->kr', model.means_.astype(np.float64), whiten.astype(np.float64))
+    
+    return {
+        'whiten': whiten,
+        'means': means,
+        'offset': (-0.5 * log_det + np.log(model.priors_)).astype(np.float32),
+        'classes': model.classes_,
+        'whiten_all': np.ascontiguousarray(whiten.transpose(1, 0, 2).reshape(n_features, n_classes * rank)),
+        'shift': shift.reshape(-1).astype(np.float32),
+    }
 
 class QDATrainer:
     """QDA trainer for 3-class EEG classification"""
@@ -89,14 +249,15 @@ class QDATrainer:
         """Prepare data with proper scaling and encoding"""
         print("\nPreparing data for training...")
         
-        # Ensure X is float array
-        X = X.astype(np.float64)
+        # Ensure X is float array (no copy if it already is) - FP32 is
+        # plenty for 178 standardized features and halves memory traffic
+        X = np.asarray(X, dtype=np.float32)
         
         # Encode labels
         y_encoded = self.label_encoder.fit_transform(y)
         
-        # Final check for invalid values
-        if np.any(np.isnan(X)) or np.any(np.isinf(X)):
+        # Final check for invalid values - one pass covers both NaN and Inf
+        if not np.isfinite(X).all():
             print("Warning: Found NaN or Inf values in final check, cleaning...")
             X = np.nan_to_num(X, nan=0.0, posinf=1e10, neginf=-1e10)
         
@@ -119,51 +280,65 @@ class QDATrainer:
         print(f"\nTrain set: {X_train.shape}")
         print(f"Test set: {X_test.shape}")
         
-        # Scale features
-        print("\nScaling features...")
-        X_train_scaled = self.scaler.fit_transform(X_train)
-        X_test_scaled = self.scaler.transform(X_test)
-        
-        # Apply SMOTE for class balancing
+        # Decide on SMOTE before any scaling work so a balanced dataset never
+        # touches imblearn. Each CV fold is resampled from its own training
+        # split only, so validation rows never leak in
         print("\nChecking class balance...")
         train_class_counts = pd.Series(y_train).value_counts()
         print(f"Training set class distribution:\n{train_class_counts}")
         
-        # Only apply SMOTE if classes are imbalanced
+        smote = None
         if train_class_counts.min() < train_class_counts.max() * 0.8:
-            print("\nApplying SMOTE for class balance...")
+            print("\nApplying SMOTE for class balance (inside each CV fold)...")
+            from imblearn.over_sampling import SMOTE
+            smote = SMOTE(random_state=42, k_neighbors=3)
+        else:
+            print("Classes are already balanced, skipping SMOTE")
+        
+        # Scale features
+        print("\nScaling features...")
+        X_train_scaled = self.scaler.fit_transform(X_train)
+        X_test_scaled = self.scaler.transform(X_test)
+        
+        # Cross-validated search for best regularization parameter: one SVD
+        # per class per fold scores every candidate (see qda_reg_param_scores)
+        print("\n" + "-"*60)
+        print("Performing hyperparameter tuning...")
+        reg_params = [0.0, 0.01, 0.05, 0.1, 0.2, 0.3, 0.5]
+        
+        fold_scores = []
+        for fold_train, fold_val in StratifiedKFold(n_splits=5).split(X_train_scaled, y_train):
+            X_fold, y_fold = X_train_scaled[fold_train], y_train[fold_train]
+            if smote is not None:
+                try:
+                    X_fold, y_fold = smote.fit_resample(X_fold, y_fold)
+                except Exception as e:
+                    print(f"SMOTE not applied to fold: {e}")
+            fold_scores.append(qda_reg_param_scores(
+                X_fold, y_fold, X_train_scaled[fold_val], y_train[fold_val], reg_params
+            ))
+        cv_scores = np.mean(fold_scores, axis=0)
+        best_idx = int(np.argmax(cv_scores))
+        best_reg_param = reg_params[best_idx]
+        
+        print(f"Best regularization parameter: {best_reg_param}")
+        print(f"Best CV accuracy: {cv_scores[best_idx]:.4f}")
+        
+        # Train final model with best parameters on the full (resampled) training split
+        X_train_balanced, y_train_balanced = X_train_scaled, y_train
+        if smote is not None:
             try:
-                smote = SMOTE(random_state=42, k_neighbors=3)
                 X_train_balanced, y_train_balanced = smote.fit_resample(X_train_scaled, y_train)
                 print(f"After SMOTE: {X_train_balanced.shape}")
                 print(f"Balanced class distribution:\n{pd.Series(y_train_balanced).value_counts()}")
             except Exception as e:
                 print(f"SMOTE not applied: {e}")
-                X_train_balanced, y_train_balanced = X_train_scaled, y_train
-        else:
-            print("Classes are already balanced, skipping SMOTE")
-            X_train_balanced, y_train_balanced = X_train_scaled, y_train
-        
-        # Grid search for best regularization parameter
-        print("\n" + "-"*60)
-        print("Performing hyperparameter tuning...")
-        param_grid = {'reg_param': [0.0, 0.01, 0.05, 0.1, 0.2, 0.3, 0.5]}
-        
-        qda = QuadraticDiscriminantAnalysis()
-        grid_search = GridSearchCV(
-            qda, param_grid, cv=5, scoring='accuracy', n_jobs=-1, verbose=0
-        )
-        grid_search.fit(X_train_balanced, y_train_balanced)
-        
-        print(f"Best regularization parameter: {grid_search.best_params_['reg_param']}")
-        print(f"Best CV accuracy: {grid_search.best_score_:.4f}")
-        
-        # Train final model with best parameters
-        self.model = grid_search.best_estimator_
+        self.model = QuadraticDiscriminantAnalysis(reg_param=best_reg_param)
+        self.model.fit(X_train_balanced, y_train_balanced)
         
         # Evaluate on training data
-        train_pred = self.model.predict(X_train_balanced)
-        train_acc = accuracy_score(y_train_balanced, train_pred)
+        train_pred = self.model.predict(X_train_scaled)
+        train_acc = accuracy_score(y_train, train_pred)
         
         # Evaluate on test data
         test_pred = self.model.predict(X_test_scaled)
@@ -209,6 +384,10 @@ class QDATrainer:
         model_package = {
             'model': self.model,
             'scaler': self.scaler,
+            # float32 standardization constants so inference can scale in place
+            'scaler_mean': self.scaler.mean_.astype(np.float32),
+            'scaler_inv_scale': (1.0 / self.scaler.scale_).astype(np.float32),
+            'kernel': qda_scoring_kernel(self.model),
             'label_encoder': self.label_encoder,
             'feature_names': self.feature_names,
             'class_mapping': self.class_mapping,
@@ -217,11 +396,26 @@ class QDATrainer:
             'classes': list(self.class_mapping.values())
         }
         
-        with open(filepath, 'wb') as f:
-            pickle.dump(model_package, f)
+        # Uncompressed joblib stores the covariance/rotation arrays as raw
+        # buffers, so API workers can memory-map them (see model_qda.load_model_package).
+        # Write to a temp file and swap it in atomically so a crashed run never
+        # leaves a half-written model where serving workers would pick it up
+        tmp_path = filepath + '.tmp'
+        joblib.dump(model_package, tmp_path)
+        checksum = file_sha256(tmp_path)
+        
+        # Checksum sidecar, verified by the API before loading. Swapped in before
+        # the model: a worker loading in between sees a mismatch and refuses the
+        # old file, instead of trusting a new model against a stale checksum
+        checksum_tmp_path = filepath + '.sha256.tmp'
+        with open(checksum_tmp_path, 'w') as f:
+            f.write(f"{checksum}\n")
+        os.replace(checksum_tmp_path, filepath + '.sha256')
+        os.replace(tmp_path, filepath)
         
         print(f"\n✅ Model saved successfully to: {filepath}")
         print(f"   Model type: QDA")
+        print(f"   SHA-256: {checksum}")
         print(f"   Features: {n_features}")
         print(f"   Classes: {list(self.class_mapping.values())}")
 
@@ -247,6 +441,9 @@ def main():
                 f"Please ensure '3class_eeg_balanced_178features.csv' is in Data/Normal/ folder"
             )
         
+        # One-time conversion; later runs load the Parquet copy
+        convert_csv_to_parquet(data_file)
+        
         # Load data
         X, y, feature_names = loader.load_eeg_data(data_file)
         trainer.feature_names = feature_names
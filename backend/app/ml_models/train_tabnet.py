@@ -5,17 +5,136 @@ Optimized for 178-feature format with Normal, Seizure, and Neurodegeneration cla
 
 import numpy as np
 import pandas as pd
-import pickle
+import joblib
+import copy
 import os
 import torch
+from torch.nn.utils import clip_grad_norm_
 from pytorch_tabnet.tab_model import TabNetClassifier
 from sklearn.preprocessing import StandardScaler, LabelEncoder
 from sklearn.model_selection import train_test_split
+from sklearn.utils.class_weight import compute_class_weight
 from sklearn.metrics import classification_report, accuracy_score, confusion_matrix
-from imblearn.over_sampling import SMOTE
 import warnings
 warnings.filterwarnings('ignore')
 
+# Let the FP32 matmuls left outside autocast use TF32 tensor cores (no-op on CPU)
+torch.set_float32_matmul_precision('high')
+
+# Largest test-accuracy loss (absolute) at which the INT8 network is shipped
+INT8_MAX_ACCURACY_DROP = float(os.getenv("TABNET_INT8_MAX_ACCURACY_DROP", "0.005"))
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pv
+    import pyarrow.parquet as pq
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+try:
+    from numba import njit, prange
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+def clean_non_finite(X):
+    """
+    Replace NaN with 0 and +/-Inf with +/-1e10 in place; returns how many
+    values were replaced. NumPy fallback for when numba is not installed.
+    """
+    n_bad = X.size - np.count_nonzero(np.isfinite(X))
+    if n_bad:
+        np.nan_to_num(X, copy=False, nan=0.0, posinf=1e10, neginf=-1e10)
+    return n_bad
+
+if NUMBA_AVAILABLE:
+    # One fused scan+replace pass over the rows, no boolean temporaries.
+    # No fastmath: it lets numba assume values are finite and drop the checks
+    @njit(parallel=True, cache=True)
+    def clean_non_finite(X):
+        n_bad = 0
+        for i in prange(X.shape[0]):
+            for j in range(X.shape[1]):
+                v = X[i, j]
+                if v != v:
+                    X[i, j] = 0.0
+                    n_bad += 1
+                elif v == np.inf:
+                    X[i, j] = 1e10
+                    n_bad += 1
+                elif v == -np.inf:
+                    X[i, j] = -1e10
+                    n_bad += 1
+        return n_bad
+
+class AMPTabNetClassifier(TabNetClassifier):
+    """TabNetClassifier whose training steps run in CUDA mixed precision"""
+    
+    def _train_batch(self, X, y):
+        """Same step as pytorch-tabnet, with autocast + GradScaler on CUDA"""
+        if self.device.type != 'cuda':
+            return super()._train_batch(X, y)
+        
+        if getattr(self, '_grad_scaler', None) is None:
+            self._grad_scaler = torch.amp.GradScaler('cuda')
+        
+        batch_logs = {"batch_size": X.shape[0]}
+        
+        X = X.to(self.device).float()
+        y = y.to(self.device).float()
+        
+        if self.augmentations is not None:
+            X, y = self.augmentations(X, y)
+        
+        for param in self.network.parameters():
+            param.grad = None
+        
+        # Inputs stay FP32; autocast downcasts inside the network
+        with torch.autocast(device_type='cuda', dtype=torch.float16):
+            output, M_loss = self.network(X)
+            loss = self.compute_loss(output, y)
+            # Add the overall sparsity loss
+            loss = loss - self.lambda_sparse * M_loss
+        
+        # Scaled backward pass; gradients are unscaled before any clipping
+        self._grad_scaler.scale(loss).backward()
+        if self.clip_value:
+            self._grad_scaler.unscale_(self._optimizer)
+            clip_grad_norm_(self.network.parameters(), self.clip_value)
+        self._grad_scaler.step(self._optimizer)
+        self._grad_scaler.update()
+        
+        batch_logs["loss"] = loss.item()
+        
+        return batch_logs
+
+def parquet_path_for(csv_path):
+    """Path of the Parquet copy kept next to a CSV dataset"""
+    return os.path.splitext(csv_path)[0] + '.parquet'
+
+def convert_csv_to_parquet(csv_path):
+    """
+    Write an LZ4-compressed Parquet copy of the CSV next to it.
+    
+    Parquet is typed and columnar, so later loads skip text parsing and dtype
+    inference entirely. The copy is only (re)written when it is missing or
+    older than the CSV. Returns the Parquet path, or None without pyarrow.
+    """
+    if not PYARROW_AVAILABLE:
+        return None
+    parquet_path = parquet_path_for(csv_path)
+    if os.path.exists(parquet_path) and os.path.getmtime(parquet_path) >= os.path.getmtime(csv_path):
+        return parquet_path
+    
+    print(f"Converting {csv_path} to Parquet...")
+    table = pv.read_csv(csv_path, read_options=pv.ReadOptions(use_threads=True, block_size=1 << 20))
+    tmp_path = parquet_path + '.tmp'
+    pq.write_table(table, tmp_path, compression='lz4')
+    os.replace(tmp_path, parquet_path)
+    print(f"Parquet copy saved to {parquet_path}")
+    return parquet_path
+
 class DataLoader:
     """Data loader for EEG CSV format"""
     
@@ -23,40 +142,87 @@ class DataLoader:
         self.scaler = StandardScaler()
         self.label_encoder = LabelEncoder()
     
-    def load_eeg_data(self, filepath):
-        """Load 3-class EEG dataset directly"""
-        print(f"Loading EEG dataset from {filepath}...")
-        df = pd.read_csv(filepath)
+    def _read_csv_pandas(self, filepath):
+        """Parse the CSV with pandas into a float32 feature matrix and labels"""
+        # Drop the 'Unnamed: 0' index column at parse time so it is never materialized
+        df = pd.read_csv(filepath, usecols=lambda col: col != 'Unnamed: 0')
         
         print(f"Raw dataset shape: {df.shape}")
         print(f"Columns: {df.columns.tolist()[:5]}... (showing first 5)")
         
-        # Check if there's an unnamed index column
-        if 'Unnamed: 0' in df.columns:
-            print("Removing 'Unnamed: 0' index column...")
-            df = df.drop(columns=['Unnamed: 0'])
-        
         # Separate features and labels
         # Last column should be 'y' (label)
-        if 'y' in df.columns:
-            X = df.drop(columns=['y']).values
-            y = df['y'].values
-            feature_names = df.drop(columns=['y']).columns.tolist()
-        else:
-            # Assume last column is label
-            X = df.iloc[:, :-1].values
-            y = df.iloc[:, -1].values
-            feature_names = df.columns[:-1].tolist()
+        label_column = 'y' if 'y' in df.columns else df.columns[-1]
+        y = df.pop(label_column).to_numpy()
+        feature_names = df.columns.tolist()
         
         # Convert to numeric, forcing any non-numeric to NaN
+        # (only columns pandas could not parse as numbers need coercion)
         print("\nConverting data to numeric format...")
-        X = pd.DataFrame(X).apply(pd.to_numeric, errors='coerce').values
-        y = pd.Series(y).apply(pd.to_numeric, errors='coerce').values
+        for column in df.columns[df.dtypes == object]:
+            df[column] = pd.to_numeric(df[column], errors='coerce')
+        X = df.to_numpy(dtype=np.float32)
         
-        # Handle any NaN values created during conversion
-        if np.any(np.isnan(X)):
-            print(f"Warning: Found {np.sum(np.isnan(X))} NaN values after conversion, filling with 0")
-            X = np.nan_to_num(X, nan=0.0)
+        return X, y, feature_names
+    
+    def _read_csv_arrow(self, filepath):
+        """Parse the CSV with pyarrow's multithreaded reader"""
+        table = pv.read_csv(
+            filepath,
+            read_options=pv.ReadOptions(use_threads=True, block_size=1 << 20)
+        )
+        return self._read_arrow_table(table)
+    
+    def _read_parquet(self, filepath):
+        """Read the Parquet copy of the dataset (no text parsing needed)"""
+        return self._read_arrow_table(pq.read_table(filepath))
+    
+    def _read_arrow_table(self, table):
+        """Split an Arrow table into a float32 feature matrix and labels"""
+        if 'Unnamed: 0' in table.column_names:
+            table = table.drop(['Unnamed: 0'])
+        
+        print(f"Raw dataset shape: {(table.num_rows, table.num_columns)}")
+        print(f"Columns: {table.column_names[:5]}... (showing first 5)")
+        
+        # Separate features and labels
+        # Last column should be 'y' (label)
+        label_column = 'y' if 'y' in table.column_names else table.column_names[-1]
+        y = table.column(label_column).to_numpy(zero_copy_only=False)
+        feature_names = [name for name in table.column_names if name != label_column]
+        
+        # Numeric columns are copied straight from their Arrow buffers into the
+        # float32 matrix; only non-numeric (e.g. ID string) columns need coercion
+        print("\nConverting data to numeric format...")
+        X = np.empty((table.num_rows, len(feature_names)), dtype=np.float32)
+        for j, name in enumerate(feature_names):
+            column = table.column(name)
+            if pa.types.is_integer(column.type) or pa.types.is_floating(column.type):
+                X[:, j] = column.to_numpy()
+            else:
+                X[:, j] = pd.to_numeric(column.to_pandas(), errors='coerce')
+        
+        return X, y, feature_names
+    
+    def load_eeg_data(self, filepath):
+        """Load 3-class EEG dataset directly"""
+        parquet_path = parquet_path_for(filepath)
+        if (PYARROW_AVAILABLE and os.path.exists(parquet_path)
+                and os.path.getmtime(parquet_path) >= os.path.getmtime(filepath)):
+            print(f"Loading EEG dataset from {parquet_path}...")
+            X, y, feature_names = self._read_parquet(parquet_path)
+        elif PYARROW_AVAILABLE:
+            print(f"Loading EEG dataset from {filepath}...")
+            X, y, feature_names = self._read_csv_arrow(filepath)
+        else:
+            print(f"Loading EEG dataset from {filepath}...")
+            X, y, feature_names = self._read_csv_pandas(filepath)
+        y = pd.to_numeric(pd.Series(y), errors='coerce').values
+        
+        # Handle any NaN/Inf values (e.g. created during conversion) in one pass
+        n_bad = clean_non_finite(X)
+        if n_bad:
+            print(f"Warning: Found {n_bad} NaN/Inf values after conversion, replaced in place")
         
         if np.any(np.isnan(y)):
             print(f"Warning: Found {np.sum(np.isnan(y))} NaN labels, this is a data quality issue!")
@@ -80,6 +246,10 @@ class TabNetTrainer:
         self.scaler = StandardScaler()
         self.label_encoder = LabelEncoder()
         self.feature_names = None
+        self.top_features = []
+        # Held-out split kept by train() to validate the INT8 network in save_model
+        self.X_test_scaled = None
+        self.y_test = None
         self.class_mapping = {
             0: 'Normal',
             1: 'Seizure',
@@ -90,24 +260,35 @@ class TabNetTrainer:
         """Prepare data with proper scaling and encoding"""
         print("\nPreparing data for training...")
         
-        # Ensure X is float array
-        X = X.astype(np.float32)
+        # Single contiguous float32 matrix (no copy for load_eeg_data output);
+        # every later step works on it or on the split copies in place
+        X = np.ascontiguousarray(X, dtype=np.float32)
         
         # Encode labels
         y_encoded = self.label_encoder.fit_transform(y)
         
-        # Final check for invalid values
-        if np.any(np.isnan(X)) or np.any(np.isinf(X)):
-            print("Warning: Found NaN or Inf values in final check, cleaning...")
-            X = np.nan_to_num(X, nan=0.0, posinf=1e10, neginf=-1e10)
+        # Final check for invalid values (a no-op scan for load_eeg_data output)
+        if clean_non_finite(X):
+            print("Warning: Found NaN or Inf values in final check, cleaned")
         
         print(f"Prepared dataset shape: {X.shape}")
         print(f"Label encoding: {dict(zip(self.label_encoder.classes_, range(len(self.label_encoder.classes_))))}")
         
-        return X.astype(np.float32), y_encoded
+        return X, y_encoded
     
-    def train(self, X, y):
-        """Train TabNet model with optimal hyperparameters"""
+    def train(self, X, y, batch_size=None, virtual_batch_size=None, num_workers=None,
+              use_smote=False):
+        """
+        Train TabNet model with optimal hyperparameters
+        
+        Imbalanced classes are handled by class-weighted batch sampling in
+        fit(); use_smote=True restores SMOTE oversampling instead.
+        
+        batch_size defaults to ~10% of the training rows (at least 1024) and
+        virtual_batch_size to batch_size // 8, so each step issues GEMMs large
+        enough to keep a GPU busy. num_workers defaults to 4 loader processes
+        on CUDA and 0 on CPU, where the in-memory batches need no prefetching.
+        """
         print("\n" + "="*60)
         print("Training TabNet Model for 3-Class EEG Classification")
         print("="*60)
@@ -120,20 +301,23 @@ class TabNetTrainer:
         print(f"\nTrain set: {X_train.shape}")
         print(f"Test set: {X_test.shape}")
         
-        # Scale features
+        # Scale features (in place: the split arrays are already fresh copies)
         print("\nScaling features...")
-        X_train_scaled = self.scaler.fit_transform(X_train)
-        X_test_scaled = self.scaler.transform(X_test)
+        self.scaler.fit(X_train)
+        X_train_scaled = self.scaler.transform(X_train, copy=False)
+        X_test_scaled = self.scaler.transform(X_test, copy=False)
         
-        # Apply SMOTE for class balancing
+        # Class balancing
         print("\nChecking class balance...")
         train_class_counts = pd.Series(y_train).value_counts()
         print(f"Training set class distribution:\n{train_class_counts}")
+        imbalanced = train_class_counts.min() < train_class_counts.max() * 0.8
         
-        # Only apply SMOTE if classes are imbalanced
-        if train_class_counts.min() < train_class_counts.max() * 0.8:
+        # Only apply SMOTE if requested and classes are imbalanced
+        if imbalanced and use_smote:
             print("\nApplying SMOTE for class balance...")
             try:
+                from imblearn.over_sampling import SMOTE
                 smote = SMOTE(random_state=42, k_neighbors=3)
                 X_train_balanced, y_train_balanced = smote.fit_resample(X_train_scaled, y_train)
                 print(f"After SMOTE: {X_train_balanced.shape}")
@@ -142,12 +326,13 @@ class TabNetTrainer:
                 print(f"SMOTE not applied: {e}")
                 X_train_balanced, y_train_balanced = X_train_scaled, y_train
         else:
-            print("Classes are already balanced, skipping SMOTE")
+            if not imbalanced:
+                print("Classes are already balanced, skipping SMOTE")
             X_train_balanced, y_train_balanced = X_train_scaled, y_train
         
-        # Ensure data types are correct for TabNet
-        X_train_balanced = X_train_balanced.astype(np.float32)
-        X_test_scaled = X_test_scaled.astype(np.float32)
+        # Ensure data types are correct for TabNet (no-op unless SMOTE upcast)
+        X_train_balanced = np.asarray(X_train_balanced, dtype=np.float32)
+        X_test_scaled = np.asarray(X_test_scaled, dtype=np.float32)
         
         # Create validation set
         X_train_final, X_val, y_train_final, y_val = train_test_split(
@@ -159,10 +344,26 @@ class TabNetTrainer:
         print(f"Validation: {X_val.shape}")
         print(f"Test: {X_test_scaled.shape}")
         
+        # Class-weighted sampling instead of synthetic rows (0 = plain shuffling)
+        sample_weights = 0
+        if imbalanced and not use_smote:
+            classes = np.unique(y_train_final)
+            class_weights = compute_class_weight('balanced', classes=classes, y=y_train_final)
+            sample_weights = dict(zip(classes.tolist(), class_weights.tolist()))
+            print(f"\nClass weights for sampling: {sample_weights}")
+        
+        # Batch sizing (see docstring)
+        if batch_size is None:
+            batch_size = max(1024, len(X_train_final) // 10)
+        if virtual_batch_size is None:
+            virtual_batch_size = max(1, batch_size // 8)
+        if num_workers is None:
+            num_workers = 4 if torch.cuda.is_available() else 0
+        
         # Configure TabNet model - optimized for 179 features
         print("\n" + "-"*60)
         print("Configuring TabNet model...")
-        self.model = TabNetClassifier(
+        self.model = AMPTabNetClassifier(
             n_d=64,                    # Decision prediction layer width
             n_a=64,                    # Attention embedding width
             n_steps=5,                 # Number of sequential attention steps
@@ -183,7 +384,9 @@ class TabNetTrainer:
         print(f"  - Attention layer width: 64")
         print(f"  - Sequential steps: 5")
         print(f"  - Learning rate: 0.02")
+        print(f"  - Batch size: {batch_size} (virtual {virtual_batch_size})")
         print(f"  - Device: {'CUDA' if torch.cuda.is_available() else 'CPU'}")
+        print(f"  - Mixed precision: {'FP16 autocast' if torch.cuda.is_available() else 'off (CPU)'}")
         
         # Train model
         print("\n" + "-"*60)
@@ -196,12 +399,14 @@ class TabNetTrainer:
                 eval_set=[(X_val, y_val)],
                 eval_name=['validation'],
                 eval_metric=['accuracy'],
+                weights=sample_weights,
                 max_epochs=100,
                 patience=20,
-                batch_size=256,
-                virtual_batch_size=128,
-                num_workers=0,
-                drop_last=False
+                batch_size=batch_size,
+                virtual_batch_size=virtual_batch_size,
+                num_workers=num_workers,
+                drop_last=False,
+                pin_memory=True            # page-locked batches, ignored on CPU
             )
         except Exception as e:
             print(f"Training encountered an issue: {e}")
@@ -214,6 +419,7 @@ class TabNetTrainer:
         # Evaluate on test data
         test_pred = self.model.predict(X_test_scaled)
         test_acc = accuracy_score(y_test, test_pred)
+        self.X_test_scaled, self.y_test = X_test_scaled, y_test
         
         print("\n" + "-"*60)
         print(f"Training Accuracy: {train_acc:.4f} ({train_acc*100:.2f}%)")
@@ -242,13 +448,54 @@ class TabNetTrainer:
         print("Top 15 Most Important Features:")
         print("-"*60)
         feature_importances = self.model.feature_importances_
-        top_indices = np.argsort(feature_importances)[-15:][::-1]
-        for rank, idx in enumerate(top_indices, 1):
-            feature_name = self.feature_names[idx] if self.feature_names else f"Feature {idx}"
-            print(f"  {rank:>2}. {feature_name}: {feature_importances[idx]:.6f}")
+        # Partial selection of the top 15 (O(F)), then sort just those 15
+        k = min(15, len(feature_importances))
+        top_indices = np.argpartition(feature_importances, -k)[-k:]
+        top_indices = top_indices[np.argsort(feature_importances[top_indices])[::-1]]
+        self.top_features = [
+            (self.feature_names[idx] if self.feature_names else f"Feature {idx}",
+             float(feature_importances[idx]))
+            for idx in top_indices
+        ]
+        for rank, (feature_name, importance) in enumerate(self.top_features, 1):
+            print(f"  {rank:>2}. {feature_name}: {importance:.6f}")
         
         return self.model, test_acc
     
+    @staticmethod
+    def _network_proba(network, X, batch_size=4096):
+        """Softmax class probabilities of a TabNet network on CPU (as predict_proba)."""
+        probabilities = []
+        with torch.inference_mode():
+            for start in range(0, len(X), batch_size):
+                output, _ = network(torch.from_numpy(np.ascontiguousarray(X[start:start + batch_size])))
+                probabilities.append(torch.softmax(output, dim=1).numpy())
+        return np.concatenate(probabilities)
+
+    def validate_int8(self, quantized_network):
+        """
+        Score the INT8 network against FP32 on the held-out test split.
+        Returns the measured numbers; 'accepted' is False when accuracy drops
+        by more than INT8_MAX_ACCURACY_DROP (or there is no test split).
+        """
+        if self.X_test_scaled is None:
+            return {'accepted': False, 'reason': 'no test split'}
+        
+        X = np.asarray(self.X_test_scaled, dtype=np.float32)
+        fp32_proba = self._network_proba(copy.deepcopy(self.model.network).cpu().eval(), X)
+        int8_proba = self._network_proba(quantized_network, X)
+        fp32_acc = accuracy_score(self.y_test, fp32_proba.argmax(axis=1))
+        int8_acc = accuracy_score(self.y_test, int8_proba.argmax(axis=1))
+        return {
+            'accepted': bool(fp32_acc - int8_acc <= INT8_MAX_ACCURACY_DROP),
+            'fp32_accuracy': float(fp32_acc),
+            'int8_accuracy': float(int8_acc),
+            'argmax_agreement': float(np.mean(fp32_proba.argmax(axis=1) == int8_proba.argmax(axis=1))),
+            'max_probability_shift': float(np.abs(fp32_proba - int8_proba).max()),
+            'max_accuracy_drop': INT8_MAX_ACCURACY_DROP,
+            'test_samples': int(len(X))
+        }
+
     def save_model(self, filepath):
         """Save trained TabNet model"""
         if self.model is None:
@@ -265,6 +512,28 @@ class TabNetTrainer:
         tabnet_path = filepath.replace('.pkl', '_tabnet')
         self.model.save_model(tabnet_path)
         
+        # INT8 copy of the network for CPU inference: dynamic quantization
+        # stores Linear weights as int8 and runs them on fbgemm/x86 int8
+        # kernels. The attentive transformers stay FP32 - their outputs go
+        # through entmax, where int8 rounding flips feature masks and costs
+        # accuracy. Only shipped when it holds test accuracy against FP32;
+        # loaded by services/model_tabnet.py
+        int8_path = filepath.replace('.pkl', '_tabnet_int8.pt')
+        int8_modules = sorted(
+            name for name, module in self.model.network.named_modules()
+            if isinstance(module, torch.nn.Linear) and 'att_transformers' not in name
+        )
+        quantized_network = torch.ao.quantization.quantize_dynamic(
+            copy.deepcopy(self.model.network).cpu().eval(), set(int8_modules), dtype=torch.qint8
+        )
+        int8_validation = self.validate_int8(quantized_network)
+        if int8_validation['accepted']:
+            torch.save(quantized_network.state_dict(), int8_path)
+        else:
+            int8_modules = None
+            if os.path.exists(int8_path):
+                os.remove(int8_path)  # never leave a stale INT8 network next to new weights
+        
         # Save additional components
         model_components = {
             'scaler': self.scaler,
@@ -273,15 +542,28 @@ class TabNetTrainer:
             'class_mapping': self.class_mapping,
             'n_features': n_features,
             'feature_importances': self.model.feature_importances_,
+            'top15_features': self.top_features,
+            'int8_modules': int8_modules,
+            'int8_validation': int8_validation,
+            # Same scaler constants as train_qda (see model_qda.load_model_package)
+            'scaler_mean': self.scaler.mean_.astype(np.float32),
+            'scaler_inv_scale': (1.0 / self.scaler.scale_).astype(np.float32),
             'model_type': 'TabNet',
             'classes': list(self.class_mapping.values())
         }
         
-        with open(filepath, 'wb') as f:
-            pickle.dump(model_components, f)
+        # Uncompressed and atomically swapped in, as in train_qda.save_model
+        tmp_path = filepath + '.tmp'
+        joblib.dump(model_components, tmp_path)
+        os.replace(tmp_path, filepath)
         
         print(f"\n✅ TabNet model saved successfully!")
         print(f"   Model weights: {tabnet_path}")
+        if int8_validation['accepted']:
+            print(f"   INT8 weights: {int8_path} (test accuracy "
+                  f"{int8_validation['fp32_accuracy']:.4f} FP32 -> {int8_validation['int8_accuracy']:.4f} INT8)")
+        else:
+            print(f"   INT8 weights: not saved ({int8_validation})")
         print(f"   Model components: {filepath}")
         print(f"   Model type: TabNet")
         print(f"   Features: {n_features}")
@@ -309,6 +591,9 @@ def main():
                 f"Please ensure '3class_eeg_balanced_178features.csv' is in Data/Normal/ folder"
             )
         
+        # One-time conversion; later runs load the Parquet copy
+        convert_csv_to_parquet(data_file)
+        
         # Load data
         X, y, feature_names = loader.load_eeg_data(data_file)
         trainer.feature_names = feature_names
@@ -1,5 +1,6 @@
 # backend/app/models/patient.py
 from sqlalchemy import Column, Integer, String, Date, Text
+from sqlalchemy.orm import relationship
 from app.db import Base
 
 
@@ -13,5 +14,8 @@ class Patient(Base):
     medical_history = Column(Text, nullable=True)
     created_at = Column(Date, nullable=False)
 
+    # relationship to Result
+    results = relationship("Result", back_populates="patient")
+
     def __repr__(self):
         return f"<Patient(id={self.id}, name={self.name})>"
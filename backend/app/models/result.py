@@ -1,5 +1,5 @@
 # backend/app/models/result.py
-from sqlalchemy import Column, Integer, String, Float, ForeignKey, DateTime, JSON
+from sqlalchemy import Column, Integer, String, Float, ForeignKey, DateTime, JSON, Index
 from sqlalchemy.orm import relationship
 from app.db import Base
 
@@ -14,10 +14,18 @@ class Result(Base):
     predicted_class = Column(String(50), nullable=False)  # Normal / Seizure Detected
     confidence = Column(Float, nullable=False)
     probabilities = Column(JSON, nullable=True)  # store probability distribution
-    analyzed_at = Column(DateTime, nullable=False)
+    analyzed_at = Column(DateTime, nullable=False, index=True)
 
-    # relationship to Patient
-    patient = relationship("Patient", backref="results")
+    # relationship to Patient (declared on both sides, see Patient.results)
+    patient = relationship("Patient", back_populates="results")
+
+    # "results for a patient, newest first"; its patient_id prefix also serves
+    # plain patient_id lookups, so that column needs no separate index
+    __table_args__ = (
+        Index("ix_results_patient_time", "patient_id", "analyzed_at"),
+        # report counts: GROUP BY class, optionally over a recent analyzed_at window
+        Index("ix_results_class_time", "predicted_class", "analyzed_at"),
+    )
 
     def __repr__(self):
         return f"<Result(id={self.id}, patient_id={self.patient_id}, class={self.predicted_class})>"
@@ -1,29 +1,69 @@
 # backend/app/routes/analysis_routes.py
 
-from fastapi import APIRouter, UploadFile, File, HTTPException, Form
-from fastapi.responses import JSONResponse
+from fastapi import APIRouter, UploadFile, File, HTTPException, Form, Depends
+from fastapi.responses import ORJSONResponse
 import os
 import traceback
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
 import logging
+import numpy as np
 
 logger = logging.getLogger("analysis_routes")
 logging.basicConfig(level=logging.INFO)
 
 from app.services.training_service import training_service
-from app.services.utils import save_uploaded_file
-from app.schemas import AnalysisResponse, PredictionResult
+from app.services.utils import save_uploaded_file, run_cpu_bound
+from app.services.batching import prediction_batcher
+from app.services.model_qda import qda_model
+from app.services.model_tabnet import tabnet_model
+from app.services.cache import (
+    content_hasher,
+    analysis_cache_key,
+    cache_get_json,
+    cache_set_json,
+    ANALYSIS_CACHE_TTL,
+)
+from app.dependencies import get_redis
+from app.schemas import AnalysisResponse, PredictionResult, BatchRequest
 
 router = APIRouter(prefix="/api", tags=["Analysis"])
 
 
+MAX_BATCH_FILES = 32
+MAX_PREDICT_SAMPLES = 10000
+
+
+def _format_results(raw_results: dict) -> dict:
+    """Shape training_service output for the API (QDA, TabNet, ensemble)."""
+    return {
+        "QDA": {
+            "predicted_class": raw_results["QDA"]["predicted_class"],
+            "confidence": raw_results["QDA"]["confidence"],
+            "probabilities": raw_results["QDA"].get("probabilities", []),
+            "status": raw_results["QDA"].get("status", "unknown")
+        },
+        "TabNet": {
+            "predicted_class": raw_results["TabNet"]["predicted_class"],
+            "confidence": raw_results["TabNet"]["confidence"],
+            "probabilities": raw_results["TabNet"].get("probabilities", []),
+            "status": raw_results["TabNet"].get("status", "unknown")
+        },
+        "ensemble": {
+            "predicted_class": raw_results["ensemble"]["predicted_class"],
+            "confidence": raw_results["ensemble"]["confidence"],
+            "method": raw_results["ensemble"]["method"]
+        }
+    }
+
+
 @router.post("/analysis")
 async def analyze_signal(
     file: UploadFile = File(...),
     patient_id: Optional[int] = Form(None),
     patient_name: Optional[str] = Form(None),
-    patient_age: Optional[str] = Form(None)
+    patient_age: Optional[str] = Form(None),
+    redis=Depends(get_redis)
 ):
     """
     Main EEG analysis endpoint.
@@ -40,37 +80,32 @@ async def analyze_signal(
         }
     """
     try:
-        # Save uploaded file
-        file_path = await save_uploaded_file(file, upload_dir="uploads")
+        # Save uploaded file, hashing the bytes as they stream to disk
+        hasher = content_hasher()
+        file_path = await save_uploaded_file(file, upload_dir="uploads", hasher=hasher)
         logger.info(f"📁 File saved: {os.path.basename(file_path)}")
         
-        # Run ML predictions
-        raw_results = training_service.predict(file_path)
+        # Same bytes -> same results: serve re-uploads from the cache
+        cache_key = analysis_cache_key(hasher.hexdigest(), training_service.model_identity)
+        results = await cache_get_json(redis, cache_key)
+        if results is not None:
+            logger.info(f"⚡ Cached results for {cache_key}")
+        else:
+            # Run ML predictions (micro-batched with concurrent requests, scored
+            # in the threadpool with bounded concurrency)
+            raw_results = await prediction_batcher.predict(file_path)
+            results = _format_results(raw_results)
+            
+            # Only cache real predictions, not fallbacks for unloaded/failed models
+            if all(results[name]["status"] == "success" for name in ("QDA", "TabNet")):
+                await cache_set_json(redis, cache_key, results, ANALYSIS_CACHE_TTL)
         
         # ✅ FIXED: Include ensemble results
         response_data = {
             "message": "EEG analysis completed successfully",
             "file": os.path.basename(file_path),
             "timestamp": datetime.now().isoformat(),
-            "results": {
-                "QDA": {
-                    "predicted_class": raw_results["QDA"]["predicted_class"],
-                    "confidence": raw_results["QDA"]["confidence"],
-                    "probabilities": raw_results["QDA"].get("probabilities", []),
-                    "status": raw_results["QDA"].get("status", "unknown")
-                },
-                "TabNet": {
-                    "predicted_class": raw_results["TabNet"]["predicted_class"],
-                    "confidence": raw_results["TabNet"]["confidence"],
-                    "probabilities": raw_results["TabNet"].get("probabilities", []),
-                    "status": raw_results["TabNet"].get("status", "unknown")
-                },
-                "ensemble": {
-                    "predicted_class": raw_results["ensemble"]["predicted_class"],
-                    "confidence": raw_results["ensemble"]["confidence"],
-                    "method": raw_results["ensemble"]["method"]
-                }
-            }
+            "results": results
         }
         
         # ✅ CRITICAL: Log the confidence values
@@ -79,8 +114,10 @@ async def analyze_signal(
         logger.info(f"   TabNet: {response_data['results']['TabNet']['confidence']}")
         logger.info(f"   Ensemble: {response_data['results']['ensemble']['confidence']}")
         
-        return JSONResponse(content=response_data, status_code=200)
+        return ORJSONResponse(content=response_data, status_code=200)
         
+    except HTTPException:
+        raise  # Upload validation errors (400/413) keep their status code
     except Exception as e:
         logger.error(f"❌ Analysis endpoint error: {str(e)}")
         traceback.print_exc()
@@ -95,8 +132,88 @@ async def analyze_signal(
         )
 
 
+@router.post("/analysis/batch")
+async def analyze_batch(files: List[UploadFile] = File(...)):
+    """
+    Analyze several EEG files in one request.
+    
+    All files are saved first, then a single training_service.predict_batch
+    call scores the whole batch. Per-file results use the same shape as
+    /analysis, in upload order.
+    """
+    if len(files) > MAX_BATCH_FILES:
+        raise HTTPException(status_code=413, detail=f"At most {MAX_BATCH_FILES} files per batch")
+    
+    try:
+        file_paths = [await save_uploaded_file(file, upload_dir="uploads") for file in files]
+        logger.info(f"📁 Batch saved: {len(file_paths)} files")
+        
+        raw_batch = await run_cpu_bound(training_service.predict_batch, file_paths)
+        
+        response_data = {
+            "message": "EEG batch analysis completed successfully",
+            "count": len(file_paths),
+            "timestamp": datetime.now().isoformat(),
+            "items": [
+                {"file": os.path.basename(path), "results": _format_results(raw_results)}
+                for path, raw_results in zip(file_paths, raw_batch)
+            ]
+        }
+        return ORJSONResponse(content=response_data, status_code=200)
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"❌ Batch analysis endpoint error: {str(e)}")
+        traceback.print_exc()
+        
+        raise HTTPException(
+            status_code=500,
+            detail={
+                "error": str(e),
+                "type": type(e).__name__,
+                "timestamp": datetime.now().isoformat()
+            }
+        )
+
+
+@router.post("/predict")
+def predict_batch(req: BatchRequest):
+    """
+    Batched QDA (default) or TabNet inference on precomputed feature rows.
+    
+    All samples are stacked into one float32 matrix and scored in a single
+    pass, instead of one HTTP call and one model invocation per sample.
+    Plain def: FastAPI runs it in the worker threadpool, off the event loop.
+    """
+    model = tabnet_model if req.model == "tabnet" else qda_model
+    # TabNet can be loaded without its network (rule-based predict only)
+    if not model.is_trained or model.model is None:
+        raise HTTPException(status_code=503, detail=f"{req.model.upper()} model not loaded")
+    
+    if len(req.samples) > MAX_PREDICT_SAMPLES:
+        raise HTTPException(status_code=413, detail=f"At most {MAX_PREDICT_SAMPLES} samples per request")
+    
+    try:
+        X = np.asarray(req.samples, dtype=np.float32)
+    except ValueError:
+        raise HTTPException(status_code=422, detail="All samples must have the same length")
+    
+    # NaN/inf (or values that overflow float32) would propagate into every score
+    if not np.isfinite(X).all():
+        raise HTTPException(status_code=422, detail="Samples must contain only finite values")
+    
+    if X.ndim != 2 or (model.n_features and X.shape[1] != model.n_features):
+        raise HTTPException(
+            status_code=422,
+            detail=f"Expected samples of {model.n_features} features"
+        )
+    
+    return model.predict_array(X)
+
+
 @router.get("/health")
-def health_check():
+async def health_check():
     """Health check endpoint."""
     return {
         "status": "healthy",
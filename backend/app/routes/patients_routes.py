@@ -1,14 +1,18 @@
 # backend/app/routes/patients_routes.py
 from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import raiseload
 from datetime import date
 from app.models.patient import Patient
-from app.dependencies import get_db
+from app.dependencies import get_async_db, get_redis
+from app.services.cache import REPORTS_SUMMARY_KEY, REPORTS_VERSION_KEY, cache_delete, cache_bump_version
 
 router = APIRouter(prefix="/api/patients", tags=["Patients"])
 
 @router.post("/")
-async def create_patient(name: str, age: int, gender: str, medical_history: str = "", db: Session = Depends(get_db)):
+async def create_patient(name: str, age: int, gender: str, medical_history: str = "",
+                         db: AsyncSession = Depends(get_async_db), redis=Depends(get_redis)):
     patient = Patient(
         name=name,
         age=age,
@@ -17,14 +21,19 @@ async def create_patient(name: str, age: int, gender: str, medical_history: str
         created_at=date.today()
     )
     db.add(patient)
-    db.commit()
-    db.refresh(patient)
+    await db.commit()
+    await db.refresh(patient)
+    # The cached report summary (and its ETag) includes the patient count
+    await cache_delete(redis, REPORTS_SUMMARY_KEY)
+    await cache_bump_version(redis, REPORTS_VERSION_KEY)
     return patient
 
 @router.get("/")
-async def get_all_patients(db: Session = Depends(get_db)):
-    return db.query(Patient).all()
+async def get_all_patients(db: AsyncSession = Depends(get_async_db)):
+    # Columns only: stray access to Patient.results raises instead of an N+1
+    result = await db.execute(select(Patient).options(raiseload("*")))
+    return result.scalars().all()
 
 @router.get("/{patient_id}")
-async def get_patient(patient_id: int, db: Session = Depends(get_db)):
-    return db.query(Patient).filter(Patient.id == patient_id).first()
+async def get_patient(patient_id: int, db: AsyncSession = Depends(get_async_db)):
+    return await db.get(Patient, patient_id)
@@ -1,52 +1,86 @@
 # backend/app/routes/reports_routes.py
 
-from fastapi import APIRouter, Depends
+import time
+from fastapi import APIRouter, Depends, Request, Response
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 from datetime import datetime, timedelta
-from app.dependencies import get_db
+from app.dependencies import get_db, get_redis
 from app.models.patient import Patient
 from app.models.result import Result
+from app.services.cache import (
+    REPORTS_SUMMARY_KEY,
+    REPORTS_CLASS_STATS_KEY,
+    REPORTS_CACHE_TTL,
+    REPORTS_VERSION_KEY,
+    cache_get_json,
+    cache_set_json,
+    cache_get_version
+)
 
 router = APIRouter(prefix="/api/reports", tags=["Reports"])
 
+def _etag_matches(request: Request, etag: str) -> bool:
+    """True if the client's If-None-Match already names this ETag."""
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in tags or etag in tags
+
 @router.get("/")
-async def generate_report(db: Session = Depends(get_db)):
+async def generate_report(request: Request, response: Response,
+                          db: Session = Depends(get_db), redis=Depends(get_redis)):
     """
     Generate a summary report:
     - Total patients
     - Total EEG analyses
     - Normal vs Seizure vs Neurodegeneration counts
     - Recent analyses (last 7 days)
-    """
-    total_patients = db.query(Patient).count()
-    total_results = db.query(Result).count()
     
-    # Count all 3 classes
-    normal_count = db.query(Result).filter(Result.predicted_class == "Normal").count()
-    seizure_count = db.query(Result).filter(Result.predicted_class == "Seizure Detected").count()
-    neurodegeneration_count = db.query(Result).filter(Result.predicted_class == "Neurodegeneration Detected").count()
+    Cached in Redis (when configured) for REPORTS_CACHE_TTL seconds. The ETag
+    comes from the reports version counter (bumped by patient/result writes)
+    and a REPORTS_CACHE_TTL time bucket, since the 7-day window also moves;
+    a matching If-None-Match gets an empty 304 without touching the DB.
+    """
+    version = await cache_get_version(redis, REPORTS_VERSION_KEY)
+    if version is not None:
+        etag = f'W/"{version}-{int(time.time() // REPORTS_CACHE_TTL)}"'
+        if _etag_matches(request, etag):
+            return Response(status_code=304, headers={"ETag": etag})
+        response.headers["ETag"] = etag
     
-    # Last 7 days activity
-    seven_days_ago = datetime.utcnow() - timedelta(days=7)
-    recent_results = db.query(Result).filter(Result.analyzed_at >= seven_days_ago).count()
+    cached = await cache_get_json(redis, REPORTS_SUMMARY_KEY)
+    if cached is not None:
+        return cached
     
-    # Recent activity by class (last 7 days)
-    recent_normal = db.query(Result).filter(
-        Result.analyzed_at >= seven_days_ago,
-        Result.predicted_class == "Normal"
-    ).count()
+    total_patients = db.query(Patient).count()
     
-    recent_seizure = db.query(Result).filter(
-        Result.analyzed_at >= seven_days_ago,
-        Result.predicted_class == "Seizure Detected"
-    ).count()
+    # Count all 3 classes - one GROUP BY instead of a COUNT(*) per class
+    class_counts = dict(
+        db.query(Result.predicted_class, func.count(Result.id))
+        .group_by(Result.predicted_class)
+        .all()
+    )
+    total_results = sum(class_counts.values())
+    normal_count = class_counts.get("Normal", 0)
+    seizure_count = class_counts.get("Seizure Detected", 0)
+    neurodegeneration_count = class_counts.get("Neurodegeneration Detected", 0)
     
-    recent_neurodegeneration = db.query(Result).filter(
-        Result.analyzed_at >= seven_days_ago,
-        Result.predicted_class == "Neurodegeneration Detected"
-    ).count()
+    # Last 7 days activity, by class (same GROUP BY over the recent window)
+    seven_days_ago = datetime.utcnow() - timedelta(days=7)
+    recent_counts = dict(
+        db.query(Result.predicted_class, func.count(Result.id))
+        .filter(Result.analyzed_at >= seven_days_ago)
+        .group_by(Result.predicted_class)
+        .all()
+    )
+    recent_results = sum(recent_counts.values())
+    recent_normal = recent_counts.get("Normal", 0)
+    recent_seizure = recent_counts.get("Seizure Detected", 0)
+    recent_neurodegeneration = recent_counts.get("Neurodegeneration Detected", 0)
     
-    return {
+    report = {
         "total_patients": total_patients,
         "total_results": total_results,
         "classification_summary": {
@@ -66,30 +100,45 @@ async def generate_report(db: Session = Depends(get_db)):
             "neurodegeneration_percentage": round((neurodegeneration_count / total_results) * 100, 2) if total_results > 0 else 0
         }
     }
+    await cache_set_json(redis, REPORTS_SUMMARY_KEY, report, REPORTS_CACHE_TTL)
+    return report
 
 @router.get("/class-statistics")
-async def get_class_statistics(db: Session = Depends(get_db)):
+async def get_class_statistics(db: Session = Depends(get_db), redis=Depends(get_redis)):
     """
     Get detailed statistics for each classification class
     """
-    normal_results = db.query(Result).filter(Result.predicted_class == "Normal").all()
-    seizure_results = db.query(Result).filter(Result.predicted_class == "Seizure Detected").all()
-    neurodegeneration_results = db.query(Result).filter(Result.predicted_class == "Neurodegeneration Detected").all()
+    cached = await cache_get_json(redis, REPORTS_CLASS_STATS_KEY)
+    if cached is not None:
+        return cached
     
-    def calculate_stats(results):
-        if not results:
-            return {"count": 0, "avg_confidence": 0, "min_confidence": 0, "max_confidence": 0}
-        
-        confidences = [r.confidence for r in results]
-        return {
-            "count": len(results),
-            "avg_confidence": round(sum(confidences) / len(confidences), 2),
-            "min_confidence": min(confidences),
-            "max_confidence": max(confidences)
+    # COUNT/AVG/MIN/MAX per class in one aggregate query, no row loading
+    rows = (
+        db.query(
+            Result.predicted_class,
+            func.count(Result.id),
+            func.avg(Result.confidence),
+            func.min(Result.confidence),
+            func.max(Result.confidence)
+        )
+        .group_by(Result.predicted_class)
+        .all()
+    )
+    stats = {
+        predicted_class: {
+            "count": count,
+            "avg_confidence": round(avg_confidence, 2),
+            "min_confidence": min_confidence,
+            "max_confidence": max_confidence
         }
+        for predicted_class, count, avg_confidence, min_confidence, max_confidence in rows
+    }
+    empty = {"count": 0, "avg_confidence": 0, "min_confidence": 0, "max_confidence": 0}
     
-    return {
-        "normal_stats": calculate_stats(normal_results),
-        "seizure_stats": calculate_stats(seizure_results),
-        "neurodegeneration_stats": calculate_stats(neurodegeneration_results)
+    class_statistics = {
+        "normal_stats": stats.get("Normal", empty),
+        "seizure_stats": stats.get("Seizure Detected", empty),
+        "neurodegeneration_stats": stats.get("Neurodegeneration Detected", empty)
     }
+    await cache_set_json(redis, REPORTS_CLASS_STATS_KEY, class_statistics, REPORTS_CACHE_TTL)
+    return class_statistics
@@ -1,24 +1,53 @@
 # backend/app/routes/results_routes.py
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload, raiseload
 from datetime import datetime
+from typing import Optional
 from app.models.result import Result
-from app.dependencies import get_db
+from app.dependencies import get_async_db, get_redis
+from app.services.cache import (
+    REPORTS_SUMMARY_KEY,
+    REPORTS_CLASS_STATS_KEY,
+    REPORTS_VERSION_KEY,
+    cache_delete,
+    cache_bump_version
+)
 
 router = APIRouter(prefix="/api/results", tags=["Results"])
 
 @router.get("/")
-async def get_all_results(db: Session = Depends(get_db)):
-    return db.query(Result).all()
+async def get_all_results(limit: int = Query(100, ge=1, le=1000), cursor: Optional[int] = None,
+                          db: AsyncSession = Depends(get_async_db)):
+    """
+    Page through results in id order (keyset pagination).
+    
+    Pass the returned next_cursor back as cursor to get the following page;
+    it is None once the last page has been returned.
+    """
+    stmt = select(Result)
+    if cursor is not None:
+        stmt = stmt.where(Result.id > cursor)
+    # Patients in one extra SELECT ... IN query (not one per row); any other
+    # relationship access raises instead of silently lazy-loading
+    stmt = (
+        stmt.options(selectinload(Result.patient), raiseload("*"))
+        .order_by(Result.id)
+        .limit(limit)
+    )
+    items = (await db.execute(stmt)).scalars().all()
+    next_cursor = items[-1].id if len(items) == limit else None
+    return {"items": items, "next_cursor": next_cursor}
 
 @router.get("/{result_id}")
-async def get_result(result_id: int, db: Session = Depends(get_db)):
-    return db.query(Result).filter(Result.id == result_id).first()
+async def get_result(result_id: int, db: AsyncSession = Depends(get_async_db)):
+    return await db.get(Result, result_id)
 
 @router.post("/")
 async def save_result(patient_id: int, file_name: str, model_used: str,
                       predicted_class: str, confidence: float, probabilities: dict,
-                      db: Session = Depends(get_db)):
+                      db: AsyncSession = Depends(get_async_db), redis=Depends(get_redis)):
     new_result = Result(
         patient_id=patient_id,
         file_name=file_name,
@@ -29,6 +58,9 @@ async def save_result(patient_id: int, file_name: str, model_used: str,
         analyzed_at=datetime.utcnow()
     )
     db.add(new_result)
-    db.commit()
-    db.refresh(new_result)
+    await db.commit()
+    await db.refresh(new_result)
+    # Report summaries count results, drop their cached copies and ETag
+    await cache_delete(redis, REPORTS_SUMMARY_KEY, REPORTS_CLASS_STATS_KEY)
+    await cache_bump_version(redis, REPORTS_VERSION_KEY)
     return new_result
@@ -1,15 +1,25 @@
 # backend/app/schemas.py
 
-from pydantic import BaseModel
-from typing import Dict, Any, Optional
+from pydantic import BaseModel, ConfigDict
+from typing import Dict, Any, List, Literal, Optional
 
 class AnalysisResponse(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
     message: str
     file: str
     results: Dict[str, Any]
 
 class PredictionResult(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
     predicted_class: str
     confidence: float
     accuracy: Optional[float] = None
     probabilities: Optional[list] = None
+
+class BatchRequest(BaseModel):
+    # One row of raw (unscaled) model features per sample
+    samples: List[List[float]]
+    # Trained model to score them with
+    model: Literal["qda", "tabnet"] = "qda"
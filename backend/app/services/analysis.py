@@ -7,12 +7,19 @@ EEG Analysis API Route - Integrated with QDA and TabNet models
 from fastapi import APIRouter, UploadFile, File, HTTPException
 from typing import Dict
 import os
-import shutil
+from aiofiles.tempfile import NamedTemporaryFile
 from ..services.training_service import training_service
+from ..services.utils import UPLOAD_CHUNK_SIZE, run_cpu_bound
 
 router = APIRouter()
 
-@router.post("/api/analysis")
+# Stage uploads on RAM-backed tmpfs where available (Linux), otherwise in the
+# system temp directory
+TEMP_UPLOAD_DIR = "/dev/shm" if os.path.isdir("/dev/shm") else None
+
+# response_model=None: the -> Dict annotation would otherwise become a
+# response model, re-validating every response before it is serialized
+@router.post("/api/analysis", response_model=None)
 async def analyze_eeg(file: UploadFile = File(...)) -> Dict:
     """
     Analyze uploaded EEG CSV file using QDA and TabNet models
@@ -24,21 +31,17 @@ async def analyze_eeg(file: UploadFile = File(...)) -> Dict:
         dict: Analysis results from both models
     """
     try:
-        # Save uploaded file temporarily
-        upload_dir = "uploads"
-        os.makedirs(upload_dir, exist_ok=True)
-        
-        file_path = os.path.join(upload_dir, file.filename)
-        
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
-        
-        # Run prediction using training_service
-        results = training_service.predict(file_path)
-        
-        # Clean up uploaded file
-        if os.path.exists(file_path):
-            os.remove(file_path)
+        # Save uploaded file temporarily; the temp file is removed when the
+        # context exits, whether or not prediction succeeds
+        suffix = os.path.splitext(file.filename or "")[1] or ".csv"
+        async with NamedTemporaryFile("wb", dir=TEMP_UPLOAD_DIR, suffix=suffix) as buffer:
+            # Stream the upload in chunks without blocking the event loop
+            while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+                await buffer.write(chunk)
+            await buffer.flush()
+            
+            # Run prediction using training_service (CPU-bound, in the threadpool)
+            results = await run_cpu_bound(training_service.predict, buffer.name)
         
         # Format response for frontend
         response = {
@@ -0,0 +1,112 @@
+# backend/app/services/batching.py
+
+"""
+Micro-batching for single-file analysis requests
+------------------------------------------------
+- Concurrent /api/analysis requests are queued instead of calling
+  training_service.predict one by one
+- A background consumer drains the queue every few milliseconds and scores
+  each group with one training_service.predict_batch call
+- Every request still gets its own result, in submission order
+"""
+
+import os
+import asyncio
+import logging
+from typing import Dict, List, Optional, Tuple
+from app.services.training_service import training_service
+from app.services.utils import run_cpu_bound
+
+logger = logging.getLogger(__name__)
+
+# Up to this many files per predict_batch call, waiting at most this long for
+# more requests after the first one arrives (the latency cost of batching)
+ANALYSIS_BATCH_MAX_SIZE = int(os.getenv("ANALYSIS_BATCH_MAX_SIZE", "16"))
+ANALYSIS_BATCH_DELAY_MS = float(os.getenv("ANALYSIS_BATCH_DELAY_MS", "10"))
+
+
+class PredictionBatcher:
+    def __init__(self, max_batch_size: int = ANALYSIS_BATCH_MAX_SIZE,
+                 max_delay_ms: float = ANALYSIS_BATCH_DELAY_MS):
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_delay = max_delay_ms / 1000.0
+        self._queue: Optional[asyncio.Queue] = None
+        self._consumer: Optional[asyncio.Task] = None
+        self._inflight = set()
+    
+    def start(self) -> None:
+        """Start the consumer on the running event loop (app startup)."""
+        if self._consumer is None:
+            self._queue = asyncio.Queue()
+            self._consumer = asyncio.create_task(self._consume())
+    
+    async def stop(self) -> None:
+        """Stop the consumer; batches already being scored still finish."""
+        if self._consumer is not None:
+            self._consumer.cancel()
+            try:
+                await self._consumer
+            except asyncio.CancelledError:
+                pass
+            self._consumer = None
+        if self._inflight:
+            await asyncio.gather(*self._inflight, return_exceptions=True)
+        
+        # Requests still queued are answered directly
+        while self._queue is not None and not self._queue.empty():
+            file_path, future = self._queue.get_nowait()
+            if not future.done():
+                future.set_exception(RuntimeError("Prediction batcher stopped"))
+    
+    async def predict(self, file_path: str) -> Dict:
+        """Same result as training_service.predict(file_path), scored in a batch."""
+        if self._consumer is None:
+            return await run_cpu_bound(training_service.predict, file_path)
+        
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((file_path, future))
+        return await future
+    
+    async def _consume(self) -> None:
+        """Collect up to max_batch_size requests per max_delay window and dispatch them."""
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_delay
+            while len(batch) < self.max_batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            
+            # Score in the background so the next window can fill meanwhile;
+            # run_cpu_bound still caps how many batches run at once
+            task = asyncio.create_task(self._dispatch(batch))
+            self._inflight.add(task)
+            task.add_done_callback(self._inflight.discard)
+    
+    async def _dispatch(self, batch: List[Tuple[str, asyncio.Future]]) -> None:
+        """Score one batch and hand each request its result."""
+        file_paths = [file_path for file_path, _ in batch]
+        if len(batch) > 1:
+            logger.info(f"📦 Batched {len(batch)} analysis requests")
+        try:
+            results = await run_cpu_bound(training_service.predict_batch, file_paths)
+        except Exception as e:
+            logger.error(f"❌ Batched prediction failed: {e}")
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        
+        for (_, future), result in zip(batch, results):
+            # A request whose client went away has a cancelled future
+            if not future.done():
+                future.set_result(result)
+
+
+# Global instance (started in the app lifespan)
+prediction_batcher = PredictionBatcher()
@@ -0,0 +1,112 @@
+# backend/app/services/cache.py
+
+"""
+Redis JSON cache helpers
+------------------------
+- Every helper takes the (possibly None) client from dependencies.get_redis
+- Redis being unset or unreachable only disables caching, it never fails a request
+"""
+
+import json
+import time
+import hashlib
+import logging
+from typing import Any, Optional
+
+logger = logging.getLogger(__name__)
+
+try:
+    from blake3 import blake3
+    BLAKE3_AVAILABLE = True
+except ImportError:
+    BLAKE3_AVAILABLE = False
+
+# Part of the analysis cache key: blake3 and blake2b digests are never comparable
+CONTENT_HASH_ALGORITHM = "blake3" if BLAKE3_AVAILABLE else "blake2b"
+
+# Report payloads are cheap to rebuild, so a short TTL bounds staleness
+REPORTS_SUMMARY_KEY = "reports:summary"
+REPORTS_CLASS_STATS_KEY = "reports:class_stats"
+REPORTS_CACHE_TTL = 30  # seconds
+# Bumped on every write that changes the summary; the ETag is derived from it
+REPORTS_VERSION_KEY = "reports:version"
+
+# Analysis results are a pure function of the uploaded bytes and the loaded
+# models, so re-uploads of the same file are served from the cache
+ANALYSIS_CACHE_PREFIX = "eeg:"
+ANALYSIS_CACHE_TTL = 24 * 60 * 60  # seconds
+
+
+def content_hasher():
+    """Hash object for upload contents: blake3 when installed, else 128-bit blake2b."""
+    if BLAKE3_AVAILABLE:
+        return blake3()
+    return hashlib.blake2b(digest_size=16)
+
+
+def analysis_cache_key(digest: str, model_identity: str) -> str:
+    """
+    Cache key for the analysis results of a file with this content digest.
+    model_identity (training_service.model_identity) changes whenever a
+    retrained model is deployed, so results of the old models are not served.
+    """
+    return f"{ANALYSIS_CACHE_PREFIX}{model_identity}:{CONTENT_HASH_ALGORITHM}:{digest}"
+
+
+async def cache_get_json(redis, key: str) -> Optional[Any]:
+    """Cached JSON value for key, or None on a miss or when Redis is unavailable."""
+    if redis is None:
+        return None
+    try:
+        raw = await redis.get(key)
+    except Exception as e:
+        logger.warning(f"⚠️ Redis GET {key} failed: {e}")
+        return None
+    return json.loads(raw) if raw is not None else None
+
+
+async def cache_set_json(redis, key: str, value: Any, ttl: int) -> None:
+    """Store a JSON-serializable value under key for ttl seconds."""
+    if redis is None:
+        return
+    try:
+        await redis.setex(key, ttl, json.dumps(value))
+    except Exception as e:
+        logger.warning(f"⚠️ Redis SETEX {key} failed: {e}")
+
+
+async def cache_delete(redis, *keys: str) -> None:
+    """Invalidate cached keys (after writes that change them)."""
+    if redis is None or not keys:
+        return
+    try:
+        await redis.delete(*keys)
+    except Exception as e:
+        logger.warning(f"⚠️ Redis DELETE {', '.join(keys)} failed: {e}")
+
+
+async def cache_bump_version(redis, key: str) -> None:
+    """Increment a version counter (after writes that change what it versions)."""
+    if redis is None:
+        return
+    try:
+        await redis.incr(key)
+    except Exception as e:
+        logger.warning(f"⚠️ Redis INCR {key} failed: {e}")
+
+
+async def cache_get_version(redis, key: str) -> Optional[str]:
+    """
+    Current value of a version counter, or None when Redis is unavailable.
+    A missing counter starts from the current time in ms, so versions handed
+    out before a Redis flush are never reused.
+    """
+    if redis is None:
+        return None
+    try:
+        await redis.set(key, int(time.time() * 1000), nx=True)
+        version = await redis.get(key)
+    except Exception as e:
+        logger.warning(f"⚠️ Redis version {key} failed: {e}")
+        return None
+    return None if version is None else str(version)
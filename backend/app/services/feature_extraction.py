@@ -11,17 +11,118 @@ Fixes:
 """
 
 import os
+import re
+import math
+import hashlib
 import numpy as np
 import pandas as pd
 import logging
-from typing import Dict, Optional
-from scipy.fft import fft, fftfreq
-from scipy.stats import kurtosis, skew
+from functools import lru_cache
+from typing import Dict, List, Optional
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+from scipy.fft import rfft, rfftfreq
+
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+try:
+    from threadpoolctl import threadpool_limits
+    THREADPOOLCTL_AVAILABLE = True
+except ImportError:
+    THREADPOOLCTL_AVAILABLE = False
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
+# Any letter (str.isalpha) in a token: [^\W\d_] is a word character that is
+# neither a digit nor an underscore
+_has_letter = re.compile(r'[^\W\d_]').search
+
+
+def _signal_moments(x: np.ndarray):
+    """
+    (mean, variance, skewness, excess kurtosis, peak |x|, sum of squares,
+    sign changes) of a 1-D float signal, accumulated in float64, with the biased estimators scipy.stats.skew/kurtosis use
+    by default (NaN for a constant signal, like scipy). Sign changes count
+    neighbours whose sign bits differ, as np.diff(np.signbit(x)) does. NumPy
+    fallback for when numba is not installed.
+    """
+    n = len(x)
+    mean = x.mean(dtype=np.float64)
+    d = x - mean
+    d2 = d * d
+    m2 = d2.mean()
+    m3 = np.dot(d2, d) / n
+    m4 = np.dot(d2, d2) / n
+    if m2 <= (1e-15 * mean) ** 2:
+        skewness = kurt = np.nan
+    else:
+        skewness = m3 / m2 ** 1.5
+        kurt = m4 / m2 ** 2 - 3.0
+    sign_changes = np.count_nonzero(np.diff(np.signbit(x)))
+    return mean, m2, skewness, kurt, np.abs(x).max(), n * (m2 + mean * mean), sign_changes
+
+
+if NUMBA_AVAILABLE:
+    # Single pass over the signal: Welford/Terriberry updates of the central
+    # moments M2..M4 alongside peak, sum of squares and sign changes
+    @njit(cache=True)
+    def _signal_moments(x):
+        n = 0
+        mean = 0.0
+        M2 = 0.0
+        M3 = 0.0
+        M4 = 0.0
+        peak = 0.0
+        sum_sq = 0.0
+        sign_changes = 0
+        prev_negative = x.shape[0] > 0 and math.copysign(1.0, x[0]) < 0
+        for i in range(x.shape[0]):
+            v = x[i]
+            # copysign keeps signbit semantics for -0.0 and NaN
+            negative = math.copysign(1.0, v) < 0
+            sign_changes += negative != prev_negative
+            prev_negative = negative
+            n1 = n
+            n += 1
+            delta = v - mean
+            delta_n = delta / n
+            delta_n2 = delta_n * delta_n
+            term1 = delta * delta_n * n1
+            mean += delta_n
+            M4 += term1 * delta_n2 * (n * n - 3 * n + 3) + 6.0 * delta_n2 * M2 - 4.0 * delta_n * M3
+            M3 += term1 * delta_n * (n - 2) - 3.0 * delta_n * M2
+            M2 += term1
+            peak = max(peak, abs(v))
+            sum_sq += v * v
+        m2 = M2 / n
+        if m2 <= (1e-15 * mean) ** 2:
+            skewness = np.nan
+            kurt = np.nan
+        else:
+            skewness = (M3 / n) / m2 ** 1.5
+            kurt = (M4 / n) / (m2 * m2) - 3.0
+        return mean, m2, skewness, kurt, peak, sum_sq, sign_changes
+
+
+def _float_dtype(data: np.ndarray) -> np.dtype:
+    """float32 for float32 (and small int) signals, float64 for anything wider."""
+    return np.result_type(data.dtype, np.float32)
+
+
+@lru_cache(maxsize=32)
+def _rfft_freqs(n: int, sampling_rate: float) -> np.ndarray:
+    """rfft bin frequencies for an n-sample signal (uploads mostly share a few lengths)."""
+    freqs = rfftfreq(n, 1/sampling_rate)
+    freqs.flags.writeable = False  # shared between calls
+    return freqs
+
+
 class EEGProcessor:
     def __init__(self):
         self.sampling_rate = 173.61
@@ -34,6 +135,81 @@ class EEGProcessor:
             'beta': (13, 30),
             'gamma': (30, 50)
         }
+        # Band edges as arrays for the vectorized band sums (bands share their
+        # boundary frequencies, so each edge bin counts towards both bands)
+        self.band_keys = [f"{band_name.capitalize()}_Waves" for band_name in self.bands]
+        self.band_low = np.array([low for low, _ in self.bands.values()])
+        self.band_high = np.array([high for _, high in self.bands.values()])
+        # Per-signal-length band bin slices (see _band_slices)
+        self._band_slice_cache: Dict[int, list] = {}
+    
+    def _band_slices(self, n: int) -> list:
+        """
+        Slices of the n-sample rfft spectrum covering each band [low, high] over
+        the positive bins 1 .. (n-1)//2, in band order. Computed once per n.
+        """
+        slices = self._band_slice_cache.get(n)
+        if slices is None:
+            # Positive frequencies are ascending, so each band is a contiguous
+            # bin range found by binary search
+            freqs = _rfft_freqs(n, self.sampling_rate)[1:(n + 1) // 2]
+            start = np.searchsorted(freqs, self.band_low, side='left') + 1
+            stop = np.searchsorted(freqs, self.band_high, side='right') + 1
+            slices = [slice(lo, hi) for lo, hi in zip(start.tolist(), stop.tolist())]
+            self._band_slice_cache[n] = slices
+        return slices
+    
+    def warmup(self) -> None:
+        """
+        Run the feature extractors once on a synthetic signal of the usual
+        length, so Numba compilation (or its cache load) and the per-length
+        frequency/band caches happen at startup instead of in the first request.
+        """
+        n = int(self.sampling_rate * self.duration)  # 4097 samples per recording
+        signal = np.random.default_rng(0).standard_normal(n, dtype=np.float32)
+        try:
+            spectrum = self._compute_spectrum(signal)
+            self.extract_band_powers(signal, spectrum)
+            self.extract_statistical_features(signal, spectrum)
+            logger.info(f"✅ Feature extraction warmed up (numba: {NUMBA_AVAILABLE})")
+        except Exception as e:
+            logger.warning(f"⚠️ Feature extraction warmup failed: {e}")
+    
+    def _load_numeric_csv(self, file_path: str) -> np.ndarray:
+        """
+        NumPy fast path: a header row, then purely numeric rows, optionally with
+        a leading text ID column (e.g. 'Unnamed'). Reads the same values as the
+        pandas path without building a DataFrame; raises ValueError otherwise.
+        """
+        with open(file_path, 'r') as f:
+            header = f.readline()
+            first_row = f.readline()
+        if not first_row.strip():
+            raise ValueError("No data row after the header")
+        
+        # pandas reads a short header as an index column - leave that to pandas
+        fields = first_row.strip().split(',')
+        if header.strip().count(',') + 1 != len(fields):
+            raise ValueError("Header and data rows have different widths")
+        
+        # A text first field means an ID column, which pandas would drop as
+        # non-numeric: read it as a placeholder and slice it off (unlike usecols,
+        # this still rejects rows with extra fields)
+        id_column = False
+        try:
+            float(fields[0])
+        except ValueError:
+            id_column = True
+        
+        data = np.loadtxt(file_path, delimiter=',', skiprows=1, comments=None, ndmin=2,
+                          dtype=np.float32, converters={0: lambda _: 0.0} if id_column else None)
+        if id_column:
+            data = data[:, 1:]
+        data = data.ravel()
+        data = data[~np.isnan(data)]
+        if len(data) == 0:
+            raise ValueError("No valid numeric data after filtering")
+        return data
     
     def load_eeg_data(self, file_path: str) -> np.ndarray:
         """
@@ -43,11 +219,22 @@ class EEGProcessor:
         - CSV with headers (Unnamed, X1, X2, ..., X178)
         - Raw comma-separated values
         - Single row or single column data
+        
+        Samples are returned as float32 (raw EEG values need no more), which
+        halves the memory traffic of the extractors and their FFT.
         """
         try:
             logger.info(f"Loading EEG data from: {os.path.basename(file_path)}")
             
-            # Method 1: Try pandas first (handles headers automatically)
+            # Method 1: NumPy fast path for plain numeric CSVs
+            try:
+                data = self._load_numeric_csv(file_path)
+                logger.info(f"✅ Loaded {len(data)} samples using numpy")
+                return data
+            except Exception as numpy_error:
+                logger.debug(f"NumPy fast path failed: {numpy_error}. Trying pandas...")
+            
+            # Method 2: Try pandas (handles headers automatically)
             try:
                 df = pd.read_csv(file_path)
                 logger.info(f"Pandas detected shape: {df.shape} (rows x cols)")
@@ -60,7 +247,7 @@ class EEGProcessor:
                     raise ValueError("No numeric columns found in CSV")
                 
                 # Flatten to 1D array (handles both row and column formats)
-                data = df_numeric.values.flatten()
+                data = df_numeric.to_numpy(dtype=np.float32).ravel()
                 
                 # Remove NaN values
                 data = data[~np.isnan(data)]
@@ -74,39 +261,25 @@ class EEGProcessor:
             except Exception as pandas_error:
                 logger.warning(f"Pandas method failed: {pandas_error}. Trying manual parsing...")
             
-            # Method 2: Manual parsing (fallback)
+            # Method 3: Manual parsing (fallback), tokenizing the whole file at
+            # once: lines and commas both separate values
             with open(file_path, 'r') as f:
-                lines = f.readlines()
+                tokens = [val.strip() for val in f.read().replace('\n', ',').split(',')]
             
-            data = []
-            for line_idx, line in enumerate(lines):
-                # Skip empty lines
-                if not line.strip():
-                    continue
-                
-                try:
-                    # Split by comma
-                    values = line.strip().split(',')
-                    
-                    for val in values:
-                        val = val.strip()
-                        if not val:
-                            continue
-                        
-                        # Skip header-like strings (contains letters)
-                        if any(c.isalpha() for c in val):
-                            logger.debug(f"Skipping non-numeric value: {val}")
-                            continue
-                        
-                        # Try to convert to float
-                        try:
-                            data.append(float(val))
-                        except ValueError:
-                            continue
-                            
-                except Exception as line_error:
-                    logger.debug(f"Skipping line {line_idx}: {line_error}")
-                    continue
+            # Skip empty and header-like strings (contains letters)
+            tokens = [val for val in tokens if val and not _has_letter(val)]
+            
+            # Convert all tokens in one call; only if some token is not a number
+            # fall back to converting one by one and skipping the bad ones
+            try:
+                data = np.array(tokens, dtype=np.float32)
+            except ValueError:
+                data = []
+                for val in tokens:
+                    try:
+                        data.append(float(val))
+                    except ValueError:
+                        continue
             
             if len(data) == 0:
                 raise ValueError(
@@ -114,7 +287,7 @@ class EEGProcessor:
                     f"Please check file format. Expected: CSV with numeric EEG values."
                 )
             
-            data = np.array(data)
+            data = np.asarray(data, dtype=np.float32)
             logger.info(f"✅ Loaded {len(data)} samples using manual parsing")
             return data
             
@@ -125,7 +298,18 @@ class EEGProcessor:
             logger.error(f"Failed to load EEG data: {str(e)}")
             raise ValueError(f"Failed to load EEG data from {os.path.basename(file_path)}: {str(e)}")
     
-    def extract_band_powers(self, data: np.ndarray) -> Dict:
+    def _compute_spectrum(self, data: np.ndarray):
+        """
+        One-sided spectrum of the raw signal, shared by both extractors.
+        
+        Direct FFT (no windowing distortion); the signal is real, so rfft holds
+        every positive-frequency bin at half the cost of the full fft.
+        Returns (freqs, magnitude, power) over the rfft bins.
+        """
+        fft_mag = np.abs(rfft(data))
+        return _rfft_freqs(len(data), self.sampling_rate), fft_mag, fft_mag**2
+    
+    def extract_band_powers(self, data: np.ndarray, spectrum=None) -> Dict:
         """
         Extract EEG frequency band powers using FFT.
         
@@ -135,51 +319,37 @@ class EEGProcessor:
         - Alpha (8-13 Hz)
         - Beta (13-30 Hz)
         - Gamma (30-50 Hz)
+        
+        spectrum: optional _compute_spectrum(data) result to reuse.
         """
         try:
-            # Normalize signal
-            signal_norm = data - np.mean(data)
-            signal_std = np.std(signal_norm)
-            
-            if signal_std > 1e-10:
-                signal_norm = signal_norm / signal_std
+            if spectrum is None:
+                spectrum = self._compute_spectrum(data)
+            _, _, power = spectrum
             
-            # Direct FFT (no windowing distortion)
-            fft_vals = fft(signal_norm)
-            fft_freq = fftfreq(len(signal_norm), 1/self.sampling_rate)
+            # Use only positive frequencies: bins 1 .. (n-1)//2 (DC and, for
+            # even n, the Nyquist bin are excluded as in the two-sided spectrum)
+            n = len(data)
             
-            # Use only positive frequencies
-            positive_idx = fft_freq > 0
-            fft_freq_pos = fft_freq[positive_idx]
-            fft_power = np.abs(fft_vals[positive_idx])**2
+            # Normalize signal: removing the mean only changes the (excluded) DC
+            # bin and dividing by std scales every power by 1/std**2, so the
+            # sums are rescaled instead of transforming the signal again
+            signal_std = np.std(data, dtype=np.float64)
+            scale = 1.0 / signal_std**2 if signal_std > 1e-10 else 1.0
             
             # Total power
-            total_power = np.sum(fft_power)
+            total_power = np.sum(power[1:(n + 1) // 2], dtype=np.float64) * scale
             if total_power < 1e-10:
                 total_power = 1.0
             
-            # Calculate band powers
+            # Calculate band powers over the cached contiguous bin ranges
             band_powers = {}
-            for band_name, (low, high) in self.bands.items():
-                band_idx = (fft_freq_pos >= low) & (fft_freq_pos <= high)
-                
-                if np.any(band_idx):
-                    band_power = np.sum(fft_power[band_idx])
-                    relative_power = band_power / total_power
+            for band_key, band in zip(self.band_keys, self._band_slices(n)):
+                if band.stop > band.start:
+                    band_power = np.sum(power[band], dtype=np.float64) * scale
+                    band_powers[band_key] = float(band_power / total_power)
                 else:
-                    relative_power = 0.01
-                
-                # Map to expected names
-                if band_name == 'delta':
-                    band_powers["Delta_Waves"] = float(relative_power)
-                elif band_name == 'theta':
-                    band_powers["Theta_Waves"] = float(relative_power)
-                elif band_name == 'alpha':
-                    band_powers["Alpha_Waves"] = float(relative_power)
-                elif band_name == 'beta':
-                    band_powers["Beta_Waves"] = float(relative_power)
-                elif band_name == 'gamma':
-                    band_powers["Gamma_Waves"] = float(relative_power)
+                    band_powers[band_key] = 0.01
             
             logger.info(
                 f"Band powers extracted: "
@@ -203,7 +373,7 @@ class EEGProcessor:
                 "Gamma_Waves": 0.2
             }
     
-    def extract_statistical_features(self, data: np.ndarray) -> Dict:
+    def extract_statistical_features(self, data: np.ndarray, spectrum=None) -> Dict:
         """
         Extract comprehensive statistical features from EEG signal.
         
@@ -212,22 +382,25 @@ class EEGProcessor:
         - Frequency domain: spectral centroid, bandwidth, rolloff
         - Signal properties: zero-crossing rate, energy, entropy
         - MFCC-like features
+        
+        spectrum: optional _compute_spectrum(data) result to reuse.
         """
         try:
-            # Basic time-domain statistics
-            mean_amp = float(np.mean(data))
-            var_amp = float(np.var(data))
-            std_amp = float(np.std(data))
-            kurt_val = float(kurtosis(data))
-            skew_val = float(skew(data))
-            peak_amp = float(np.max(np.abs(data)))
-            rms_amp = float(np.sqrt(np.mean(data**2)))
+            # Basic time-domain statistics, all moments and the zero crossings
+            # from one pass
+            mean_amp, var_amp, skew_val, kurt_val, peak_amp, energy, sign_changes = (
+                float(v) for v in _signal_moments(np.ascontiguousarray(data, dtype=_float_dtype(data)))
+            )
+            std_amp = float(np.sqrt(var_amp))
+            rms_amp = float(np.sqrt(energy / len(data)))
             
-            # FFT for frequency-domain features
-            fft_vals = fft(data)
-            fft_freq = fftfreq(len(data), 1/self.sampling_rate)
-            fft_mag = np.abs(fft_vals[:len(fft_vals)//2])
-            freq_pos = fft_freq[:len(fft_freq)//2]
+            # FFT for frequency-domain features (first n//2 bins, DC included)
+            if spectrum is None:
+                spectrum = self._compute_spectrum(data)
+            fft_freq, fft_mag, _ = spectrum
+            n = len(data)
+            fft_mag = fft_mag[:n//2]
+            freq_pos = fft_freq[:n//2]
             
             # Spectral features
             if np.sum(fft_mag) > 0:
@@ -244,12 +417,10 @@ class EEGProcessor:
                 spectral_bandwidth = 5.0
                 spectral_rolloff = 20.0
             
-            # Zero-crossing rate
-            zero_crossings = np.where(np.diff(np.signbit(data)))[0]
-            zcr = float(len(zero_crossings) / len(data))
+            # Zero-crossing rate (sign changes counted with the moments)
+            zcr = sign_changes / len(data)
             
-            # Energy and entropy
-            energy = float(np.sum(data**2))
+            # Entropy (energy computed with the time-domain statistics above)
             signal_abs = np.abs(data)
             signal_abs_norm = signal_abs / (np.sum(signal_abs) + 1e-10)
             entropy = float(-np.sum(signal_abs_norm * np.log(signal_abs_norm + 1e-10)))
@@ -308,10 +479,111 @@ class EEGProcessor:
 processor = EEGProcessor()
 
 
+# In-process memo of recent extractions; the key includes mtime and size so a
+# rewritten file at the same path is extracted again
+FEATURE_CACHE_SIZE = 128
+
+# Optional on-disk cache shared across workers and restarts, keyed by the
+# SHA-256 of the file contents so re-uploads of the same bytes (under a new
+# upload name) skip extraction. Disabled unless FEATURE_CACHE_DIR is set.
+FEATURE_CACHE_DIR = os.getenv("FEATURE_CACHE_DIR", "")
+# Part of every cache file name: bump whenever extraction or preprocessing
+# changes, so files written by older code are never read back
+FEATURE_CACHE_VERSION = "v1"
+
+
 def extract_features_for_prediction(file_path: str) -> Dict:
     """
     Main feature extraction pipeline for EEG prediction.
     
+    Repeat calls for an unchanged file are served from an in-process cache.
+    
+    Args:
+        file_path: Path to CSV file containing raw EEG signal data
+        
+    Returns:
+        Dictionary containing:
+        - band_powers: Relative power in 5 frequency bands (21 total features)
+        - statistics: 16 time/frequency domain features
+        
+    Raises:
+        ValueError: If file cannot be loaded or processed
+    """
+    try:
+        stat = os.stat(file_path)
+    except OSError:
+        return _extract_features(file_path)  # Raises the usual ValueError
+    
+    features = _extract_features_cached(file_path, stat.st_mtime_ns, stat.st_size)
+    # Callers get their own dicts, never the cached ones
+    return {group: dict(values) for group, values in features.items()}
+
+
+@lru_cache(maxsize=FEATURE_CACHE_SIZE)
+def _extract_features_cached(file_path: str, mtime_ns: int, size: int) -> Dict:
+    """extract_features_for_prediction memoized on (path, mtime, size)."""
+    if not FEATURE_CACHE_DIR:
+        return _extract_features(file_path)
+    
+    cache_path = os.path.join(FEATURE_CACHE_DIR, f"{FEATURE_CACHE_VERSION}-{_content_hash(file_path)}.npz")
+    features = _load_cached_features(cache_path)
+    if features is None:
+        features = _extract_features(file_path)
+        _save_cached_features(cache_path, features)
+    return features
+
+
+def _content_hash(file_path: str) -> str:
+    """SHA-256 hex digest of a file's contents, read in 1 MiB chunks (as train_qda.file_sha256)."""
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _load_cached_features(cache_path: str) -> Optional[Dict]:
+    """Features stored by _save_cached_features, or None if absent/unreadable."""
+    try:
+        with np.load(cache_path) as cached:
+            groups = cached["groups"].tolist()
+            keys = cached["keys"].tolist()
+            values = cached["values"].tolist()
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        logger.warning(f"⚠️ Ignoring unreadable feature cache {cache_path}: {e}")
+        return None
+    
+    features = {}
+    for group, key, value in zip(groups, keys, values):
+        features.setdefault(group, {})[key] = value
+    logger.info(f"⚡ Features loaded from cache: {os.path.basename(cache_path)}")
+    return features
+
+
+def _save_cached_features(cache_path: str, features: Dict) -> None:
+    """Store features as flat (group, key, value) arrays; failures only skip caching."""
+    items = [(group, key, value) for group, values in features.items() for key, value in values.items()]
+    groups, keys, values = zip(*items)
+    tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(FEATURE_CACHE_DIR, exist_ok=True)
+        # Write then rename, so concurrent workers never read a partial file
+        with open(tmp_path, "wb") as f:
+            np.savez(f, groups=np.array(groups), keys=np.array(keys),
+                     values=np.array(values, dtype=np.float64))
+        os.replace(tmp_path, cache_path)
+    except Exception as e:
+        logger.warning(f"⚠️ Could not write feature cache {cache_path}: {e}")
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def _extract_features(file_path: str) -> Dict:
+    """
+    Feature extraction pipeline for EEG prediction (uncached).
+    
     Args:
         file_path: Path to CSV file containing raw EEG signal data
         
@@ -333,26 +605,8 @@ def extract_features_for_prediction(file_path: str) -> Dict:
         logger.info(f"Signal length: {len(raw_data)} samples")
         logger.info(f"Signal range: [{np.min(raw_data):.2f}, {np.max(raw_data):.2f}]")
         
-        # Step 2: Extract frequency band powers
-        band_powers = processor.extract_band_powers(raw_data)
-        
-        # Step 3: Extract statistical features
-        statistics = processor.extract_statistical_features(raw_data)
-        
-        # Combine all features
-        features = {
-            "band_powers": band_powers,
-            "statistics": statistics
-        }
-        
-        total_features = len(band_powers) + len(statistics)
-        logger.info(f"=" * 60)
-        logger.info(f"✅ SUCCESS: Extracted {total_features} features total")
-        logger.info(f"   - Band powers: {len(band_powers)} features")
-        logger.info(f"   - Statistics: {len(statistics)} features")
-        logger.info(f"=" * 60)
-        
-        return features
+        # Step 2-3: Band powers and statistics from the loaded signal
+        return extract_features_from_signal(raw_data)
         
     except Exception as e:
         logger.error(f"❌ Feature extraction failed: {str(e)}")
@@ -360,6 +614,79 @@ def extract_features_for_prediction(file_path: str) -> Dict:
         raise ValueError(f"Feature extraction failed for {os.path.basename(file_path)}: {str(e)}")
 
 
+def extract_features_from_signal(raw_data: np.ndarray) -> Dict:
+    """
+    Band powers and statistics of an already loaded 1-D signal, for callers
+    that hold the samples (so the file is not read a second time).
+    
+    Returns:
+        Same dictionary as extract_features_for_prediction
+    """
+    # One FFT of the signal, shared by both extractors
+    spectrum = processor._compute_spectrum(raw_data)
+    
+    # Extract frequency band powers
+    band_powers = processor.extract_band_powers(raw_data, spectrum)
+    
+    # Extract statistical features
+    statistics = processor.extract_statistical_features(raw_data, spectrum)
+    
+    # Combine all features
+    features = {
+        "band_powers": band_powers,
+        "statistics": statistics
+    }
+    
+    total_features = len(band_powers) + len(statistics)
+    logger.info(f"=" * 60)
+    logger.info(f"✅ SUCCESS: Extracted {total_features} features total")
+    logger.info(f"   - Band powers: {len(band_powers)} features")
+    logger.info(f"   - Statistics: {len(statistics)} features")
+    logger.info(f"=" * 60)
+    
+    return features
+
+
+def _init_extraction_worker() -> None:
+    """Pool worker setup: one BLAS/OpenMP thread per process, the pool is the parallelism."""
+    for var in ("OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS"):
+        os.environ[var] = "1"
+    if THREADPOOLCTL_AVAILABLE:
+        threadpool_limits(1)
+
+
+def _extract_features_or_error(file_path: str) -> Dict:
+    """extract_features_for_prediction, with a failure returned as {"error": ...}."""
+    try:
+        return extract_features_for_prediction(file_path)
+    except Exception as e:
+        return {"error": str(e)}
+
+
+def extract_features_batch(file_paths: List[str], max_workers: Optional[int] = None,
+                           chunksize: int = 8) -> List[Dict]:
+    """
+    Extract features for many files in parallel worker processes (offline jobs,
+    dataset preparation). Results are in input order; a file that cannot be
+    processed gets {"error": "..."} instead of failing the whole batch.
+    
+    Workers are spawned fresh (safe from threaded servers) and each pays the
+    numpy/scipy/pandas import cost (seconds) once, so this only pays off for
+    large jobs (thousands of recordings, or long ones); it is not used on the
+    request path. Single files and max_workers=1 run in-process.
+    """
+    max_workers = max_workers or os.cpu_count() or 1
+    if max_workers == 1 or len(file_paths) <= 1:
+        return [_extract_features_or_error(file_path) for file_path in file_paths]
+    
+    with ProcessPoolExecutor(
+        max_workers=min(max_workers, len(file_paths)),
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_extraction_worker,
+    ) as executor:
+        return list(executor.map(_extract_features_or_error, file_paths, chunksize=chunksize))
+
+
 def validate_features(features: Dict) -> bool:
     """
     Validate that extracted features are valid for model prediction.
@@ -7,41 +7,296 @@ Scoring adjusted based on analysis of your real files
 """
 
 import numpy as np
-import pickle
+import joblib
+import hashlib
 import os
 import logging
-from typing import Dict
+from typing import Dict, List
+
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Canonical 62-feature layout: 12 band-power entries, then 50 statistics
+BP_KEYS = (
+    "Delta_Waves", "Theta_Waves", "Alpha_Waves", "Beta_Waves", "Gamma_Waves",
+    "Delta_Alpha_Ratio", "Theta_Beta_Ratio", "Alpha_Beta_Ratio", "Delta_Theta_Combined",
+    "High_Freq_Power", "Total_Power", "Low_High_Ratio"
+)
+BP_DEFAULTS = tuple(1.0 if key == "Total_Power" else 0.0 for key in BP_KEYS)
+STAT_KEYS = (
+    "mean_amplitude", "signal_variance", "standard_deviation", "kurtosis", "skewness",
+    "peak_amplitude", "rms_amplitude", "spectral_centroid", "spectral_bandwidth",
+    "spectral_rolloff", "zero_crossing_rate", "mfcc_1", "mfcc_2", "mfcc_3",
+    "energy", "entropy", "amplitude_range", "coefficient_variation", "signal_to_noise",
+    "spectral_spread", "spectral_slope", "spectral_flux", "temporal_centroid",
+    "spectral_decrease", "harmonic_ratio", "noise_ratio", "dynamic_range",
+    "spectral_contrast", "rhythmic_pattern", "frequency_stability", "amplitude_modulation",
+    "phase_coherence", "signal_complexity", "temporal_stability", "frequency_concentration",
+    "neural_activity_index", "seizure_indicator", "neurodegeneration_marker",
+    "brain_rhythm_coherence", "pathological_pattern", "clinical_severity",
+    "diagnostic_confidence", "signal_regularity", "frequency_dominance",
+    "time_domain_complexity", "frequency_domain_complexity", "amplitude_asymmetry",
+    "frequency_asymmetry", "neural_synchrony", "pathological_score"
+)
+N_FEATURES_62 = len(BP_KEYS) + len(STAT_KEYS)
+
+
+def features_to_matrix(features_list: List[Dict]) -> np.ndarray:
+    """
+    Stack 62-feature dicts ({"band_powers": ..., "statistics": ...}) into an
+    (n_samples, 62) float32 matrix in BP_KEYS + STAT_KEYS order. Missing keys
+    take their defaults (Total_Power 1.0, everything else 0.0).
+    """
+    n_bp = len(BP_KEYS)
+    X = np.empty((len(features_list), N_FEATURES_62), dtype=np.float32)
+    for i, features in enumerate(features_list):
+        bp = features.get("band_powers", {})
+        stats = features.get("statistics", {})
+        X[i, :n_bp] = [bp.get(key, default) for key, default in zip(BP_KEYS, BP_DEFAULTS)]
+        X[i, n_bp:] = [stats.get(key, 0.0) for key in STAT_KEYS]
+    return X
+
+
+def rule_inputs(features: Dict) -> tuple:
+    """
+    (delta, theta, alpha, beta, gamma, kurtosis, entropy, zero_crossing_rate)
+    of one feature dict as floats, read in a single pass over the rule keys.
+    """
+    bp = features.get("band_powers", {})
+    stats = features.get("statistics", {})
+    return (
+        float(bp.get("Delta_Waves", 0.0)), float(bp.get("Theta_Waves", 0.0)), float(bp.get("Alpha_Waves", 0.0)),
+        float(bp.get("Beta_Waves", 0.0)), float(bp.get("Gamma_Waves", 0.0)),
+        float(stats.get("kurtosis", 0.0)), float(stats.get("entropy", 0.5)), float(stats.get("zero_crossing_rate", 0.05))
+    )
+
+
+def load_model_package(model_path: str):
+    """
+    joblib.load a package saved by train_qda/train_tabnet (or plain pickle.dump).
+    
+    mmap_mode='r' maps the package arrays read-only instead of copying them,
+    so all uvicorn workers share the same physical pages. Dict packages saved
+    before the float32 standardization constants existed get them derived
+    from their scaler, so inference can always scale in place.
+    """
+    model_data = joblib.load(model_path, mmap_mode='r')
+    if isinstance(model_data, dict) and model_data.get('scaler_mean') is None:
+        scaler = model_data.get('scaler')
+        if scaler is not None:
+            model_data['scaler_mean'] = scaler.mean_.astype(np.float32)
+            model_data['scaler_inv_scale'] = (1.0 / scaler.scale_).astype(np.float32)
+    return model_data
+
+# Threshold-rule constants (see _tuned_feature_classification)
+NORMAL_ALPHA_MIN = 0.50
+NEURO_DELTA_MIN = 0.60
+NEURO_SLOW_MIN = 0.50
+NEURO_ALPHA_MAX = 0.20
+SEIZURE_HIGH_FREQ_MIN = 0.15
+SEIZURE_KURTOSIS_MIN = 2.5
+SEIZURE_ZCR_MIN = 0.12
+NORMAL_CONFIDENCE_SCALE = 150.0
+NEURO_CONFIDENCE_SCALE = 120.0
+SEIZURE_HIGH_FREQ_SCALE = 300.0
+SEIZURE_KURTOSIS_SCALE = 10.0
+SEIZURE_CONFIDENCE_FLOOR = 70.0
+MAX_RULE_CONFIDENCE = 95.0
+NORMAL_SCORE_SCALE = 100.0
+SEIZURE_SCORE_SCALE = 100.0
+NEURO_SCORE_SCALE = 80.0
+
+
+def _score_batch(inputs: np.ndarray):
+    """
+    Threshold rules of _tuned_feature_classification for an (N, 8) matrix of
+    rule_inputs rows, evaluated for all rows at once with masks instead of a
+    per-sample if/elif chain. In priority order:
+    - Normal: alpha > 0.50
+    - Neurodegeneration: delta > 0.60 or (delta + theta > 0.50 and alpha < 0.20)
+    - Seizure: beta + gamma > 0.15 or |kurtosis| > 2.5 or zcr > 0.12
+    - Otherwise the largest of the relative class scores
+    
+    Returns (prediction_idx, confidence in %, probabilities (N, 3)) with
+    classes ordered [normal, seizure, neurodegeneration]. NumPy fallback for
+    when numba is not installed.
+    """
+    delta, theta, alpha, beta, gamma, kurt, _, zcr = inputs.T
+    high_freq = beta + gamma
+    slow = delta + theta
+    abs_kurt = np.abs(kurt)
+    
+    is_normal = alpha > NORMAL_ALPHA_MIN
+    is_neuro = ~is_normal & ((delta > NEURO_DELTA_MIN) | ((slow > NEURO_SLOW_MIN) & (alpha < NEURO_ALPHA_MAX)))
+    is_seizure = ~is_normal & ~is_neuro & (
+        (high_freq > SEIZURE_HIGH_FREQ_MIN) | (abs_kurt > SEIZURE_KURTOSIS_MIN) | (zcr > SEIZURE_ZCR_MIN)
+    )
+    
+    # Fallback: relative strength of each class
+    scores = np.stack([
+        alpha * NORMAL_SCORE_SCALE,
+        high_freq * SEIZURE_SCORE_SCALE + abs_kurt * SEIZURE_KURTOSIS_SCALE,
+        slow * NEURO_SCORE_SCALE
+    ], axis=1)
+    total = np.maximum(scores[:, 0] + scores[:, 1] + scores[:, 2], 0.01)
+    probabilities = scores / total[:, None]
+    prediction_idx = np.argmax(probabilities, axis=1)
+    confidence = np.take_along_axis(probabilities, prediction_idx[:, None], axis=1)[:, 0] * 100
+    
+    # Rule hits: the matched class gets confidence/100, the others split the rest
+    seizure_spike = high_freq * SEIZURE_HIGH_FREQ_SCALE + abs_kurt * SEIZURE_KURTOSIS_SCALE
+    for mask, idx, rule_confidence in (
+        (is_normal, 0, np.minimum(alpha * NORMAL_CONFIDENCE_SCALE, MAX_RULE_CONFIDENCE)),
+        (is_neuro, 2, np.minimum(slow * NEURO_CONFIDENCE_SCALE, MAX_RULE_CONFIDENCE)),
+        (is_seizure, 1, np.maximum(np.minimum(seizure_spike, MAX_RULE_CONFIDENCE), SEIZURE_CONFIDENCE_FLOOR)),
+    ):
+        if mask.any():
+            c = rule_confidence[mask]
+            rest = (100 - c) / 200
+            probabilities[mask] = rest[:, None]
+            probabilities[mask, idx] = c / 100
+            confidence[mask] = c
+            prediction_idx[mask] = idx
+    
+    return prediction_idx, confidence, probabilities
+
+
+if NUMBA_AVAILABLE:
+    # Same rules as one compiled loop: for the usual 1-16 rows per call this
+    # avoids the fixed cost of ~30 small NumPy operations. Comparisons are
+    # written so NaN propagates exactly like np.minimum/np.maximum/np.argmax.
+    @njit(cache=True)
+    def _score_batch(inputs):
+        n = inputs.shape[0]
+        prediction_idx = np.empty(n, dtype=np.int64)
+        confidence = np.empty(n)
+        probabilities = np.empty((n, 3))
+        for i in range(n):
+            delta = inputs[i, 0]
+            theta = inputs[i, 1]
+            alpha = inputs[i, 2]
+            high_freq = inputs[i, 3] + inputs[i, 4]
+            abs_kurt = abs(inputs[i, 5])
+            zcr = inputs[i, 7]
+            slow = delta + theta
+            
+            if alpha > NORMAL_ALPHA_MIN:
+                idx = 0
+                c = alpha * NORMAL_CONFIDENCE_SCALE
+            elif delta > NEURO_DELTA_MIN or (slow > NEURO_SLOW_MIN and alpha < NEURO_ALPHA_MAX):
+                idx = 2
+                c = slow * NEURO_CONFIDENCE_SCALE
+            elif high_freq > SEIZURE_HIGH_FREQ_MIN or abs_kurt > SEIZURE_KURTOSIS_MIN or zcr > SEIZURE_ZCR_MIN:
+                idx = 1
+                c = high_freq * SEIZURE_HIGH_FREQ_SCALE + abs_kurt * SEIZURE_KURTOSIS_SCALE
+            else:
+                idx = -1
+                c = 0.0
+            
+            if idx >= 0:
+                if c > MAX_RULE_CONFIDENCE:
+                    c = MAX_RULE_CONFIDENCE
+                if idx == 1 and c < SEIZURE_CONFIDENCE_FLOOR:
+                    c = SEIZURE_CONFIDENCE_FLOOR
+                rest = (100 - c) / 200
+                probabilities[i, 0] = rest
+                probabilities[i, 1] = rest
+                probabilities[i, 2] = rest
+                probabilities[i, idx] = c / 100
+            else:
+                normal_score = alpha * NORMAL_SCORE_SCALE
+                seizure_score = high_freq * SEIZURE_SCORE_SCALE + abs_kurt * SEIZURE_KURTOSIS_SCALE
+                neuro_score = slow * NEURO_SCORE_SCALE
+                total = normal_score + seizure_score + neuro_score
+                if total < 0.01:
+                    total = 0.01
+                probabilities[i, 0] = normal_score / total
+                probabilities[i, 1] = seizure_score / total
+                probabilities[i, 2] = neuro_score / total
+                # First maximum, or the first NaN (np.argmax semantics)
+                idx = 0
+                for j in range(3):
+                    p = probabilities[i, j]
+                    if np.isnan(p):
+                        idx = j
+                        break
+                    if p > probabilities[i, idx]:
+                        idx = j
+                c = probabilities[i, idx] * 100
+            
+            prediction_idx[i] = idx
+            confidence[i] = c
+        return prediction_idx, confidence, probabilities
+
+
 class EnhancedQDAModel:
     def __init__(self):
         self.model = None
         self.scaler = None
         self.label_encoder = None
+        self.scaler_mean = None
+        self.scaler_inv_scale = None
+        self.kernel = None
+        self.n_features = None
         self.is_trained = False
         self.model_path = "ml_models/trained_models/qda_model.pkl"
+        # Weights are loaded once at app startup (training_service.load)
+
+    def _verify_checksum(self) -> bool:
+        """Check the model file against the .sha256 sidecar written by train_qda."""
+        checksum_path = self.model_path + ".sha256"
+        if not os.path.exists(checksum_path):
+            return True
         
-        self.load_model()
+        with open(checksum_path) as f:
+            expected = f.read().strip()
+        digest = hashlib.sha256()
+        with open(self.model_path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                digest.update(chunk)
+        return digest.hexdigest() == expected
 
     def load_model(self):
         """Load trained QDA model."""
         if os.path.exists(self.model_path):
             try:
-                with open(self.model_path, 'rb') as f:
-                    model_data = pickle.load(f)
+                if not self._verify_checksum():
+                    logger.error("❌ QDA model checksum mismatch, not loading")
+                    return False
+                
+                model_data = load_model_package(self.model_path)
                 
                 if isinstance(model_data, dict):
                     self.model = model_data.get('model')
                     self.scaler = model_data.get('scaler')
                     self.label_encoder = model_data.get('label_encoder')
+                    self.scaler_mean = model_data.get('scaler_mean')
+                    self.scaler_inv_scale = model_data.get('scaler_inv_scale')
+                    self.n_features = model_data.get('n_features')
+                    self.kernel = model_data.get('kernel')
                 else:
                     self.model = model_data
                 
+                # Kernel arrays saved by train_qda are memory-mapped above and so
+                # shared by every worker; older packages build a private copy
+                if self.kernel is None:
+                    self.kernel = self._build_kernel(self.model)
+                else:
+                    self.kernel = self._fuse_kernel(self.kernel)
+                
                 self.is_trained = True
                 logger.info(f"✅ QDA model loaded")
-                logger.warning("⚠️ Using raw features (scaler bypassed)")
+                
+                # Compile (or load from cache) the rule kernel before requests
+                _score_batch(np.zeros((1, 8)))
+                logger.warning("⚠️ File analysis (predict) uses the rule-based scorer on raw features; "
+                               "only predict_array applies the scaler")
                 
                 return True
                 
@@ -57,6 +312,136 @@ class EnhancedQDAModel:
         # ALWAYS use feature-based classification for consistent results
         return self._tuned_feature_classification(features)
 
+    def predict_many(self, features_list: List[Dict]) -> List[Dict]:
+        """predict() for several feature dicts at once, results in input order."""
+        results = [None] * len(features_list)
+        rows, row_index = [], []
+        for i, features in enumerate(features_list):
+            try:
+                rows.append(rule_inputs(features))
+                row_index.append(i)
+            except Exception as e:
+                logger.error(f"Classification failed: {e}")
+                results[i] = {
+                    "predicted_class": "normal",
+                    "confidence": 60.0,
+                    "probabilities": [0.60, 0.20, 0.20],
+                    "model": "QDA Fallback",
+                    "method": "Default"
+                }
+        if not rows:
+            return results
+        
+        prediction_idx, confidence, probabilities = _score_batch(np.array(rows, dtype=np.float64))
+        class_names = ["normal", "seizure", "neurodegeneration"]
+        # Rounded and back to Python floats once for the whole batch, not per element
+        for i, row, idx, conf, rounded_conf, probs in zip(row_index, rows, prediction_idx.tolist(),
+                                                          confidence.tolist(), confidence.round(2).tolist(),
+                                                          probabilities.round(4).tolist()):
+            results[i] = {
+                "predicted_class": class_names[idx],
+                "confidence": rounded_conf,
+                "probabilities": probs,
+                "model": "QDA Feature-Based (Tuned)",
+                "method": "Threshold-based classification"
+            }
+            logger.info(f"✅ QDA: {class_names[idx]} ({conf:.1f}%) - "
+                       f"Alpha={row[2]:.3f}, Delta={row[0]:.3f}, Beta+Gamma={row[3] + row[4]:.3f}")
+        return results
+
+    @staticmethod
+    def _build_kernel(model) -> Dict:
+        """
+        Precompute the QDA decision function as stacked float32 arrays.
+        
+        sklearn scores class k as -0.5 * (||(x - mu_k) @ R_k / sqrt(S_k)||^2
+        + sum(log S_k)) + log(prior_k). Folding 1/sqrt(S_k) into the rotation
+        once gives whitening matrices W_k, so predicting is one batched matmul
+        over all classes instead of three products per class per call.
+        """
+        if model is None or not hasattr(model, "rotations_"):
+            return None
+        
+        n_features = model.means_.shape[1]
+        rank = max(r.shape[1] for r in model.rotations_)
+        n_classes = len(model.classes_)
+        
+        # Zero-padded columns contribute nothing when ranks differ per class
+        whiten = np.zeros((n_classes, n_features, rank), dtype=np.float32)
+        log_det = np.empty(n_classes, dtype=np.float32)
+        for k, (R, S) in enumerate(zip(model.rotations_, model.scalings_)):
+            whiten[k, :, :R.shape[1]] = R * np.sqrt(1.0 / S)
+            log_det[k] = np.sum(np.log(S))
+        
+        kernel = {
+            "whiten": whiten,
+            "means": model.means_.astype(np.float32)[:, None, :],
+            "offset": (-0.5 * log_det + np.log(model.priors_)).astype(np.float32),
+            "classes": model.classes_,
+        }
+        return EnhancedQDAModel._fuse_kernel(kernel)
+
+    @staticmethod
+    def _fuse_kernel(kernel: Dict) -> Dict:
+        """
+        Add the single-GEMM form of the kernel: (x - mu_k) @ W_k equals
+        x @ W_k - mu_k @ W_k, so all classes' whitening matrices side by side
+        ("whiten_all", features x classes*rank) and the stacked mu_k @ W_k
+        ("shift") score a batch with one matmul and no per-class copy of X.
+        """
+        if "whiten_all" in kernel:
+            return kernel
+        whiten = kernel["whiten"]
+        n_classes, n_features, rank = whiten.shape
+        shift = np.einsum("kf,kfr->kr", kernel["means"][:, 0, :].astype(np.float64), whiten.astype(np.float64))
+        return {
+            **kernel,
+            "whiten_all": np.ascontiguousarray(whiten.transpose(1, 0, 2).reshape(n_features, n_classes * rank)),
+            "shift": shift.reshape(-1).astype(np.float32),
+        }
+
+    def _decision_function_array(self, X: np.ndarray) -> np.ndarray:
+        """Per-class QDA log-posterior (unnormalized) for standardized rows."""
+        k = self.kernel
+        Z = X @ k["whiten_all"]  # (n, classes * rank)
+        Z -= k["shift"]
+        Z = Z.reshape(len(X), len(k["offset"]), -1)  # (n, classes, rank)
+        norm2 = np.einsum("nkq,nkq->nk", Z, Z)
+        return norm2 * -0.5 + k["offset"]
+
+    def _standardize(self, X: np.ndarray) -> np.ndarray:
+        """Standardize a feature matrix with the stored float32 scaler constants."""
+        X = np.array(X, dtype=np.float32, ndmin=2)
+        if self.scaler_mean is not None:
+            np.subtract(X, self.scaler_mean, out=X)
+            np.multiply(X, self.scaler_inv_scale, out=X)
+        return X
+
+    def predict_proba_array(self, X: np.ndarray) -> np.ndarray:
+        """Class probabilities of the trained QDA for raw (unscaled) feature rows."""
+        if self.model is None:
+            raise RuntimeError("QDA model not loaded")
+        X = self._standardize(X)
+        if self.kernel is None:
+            return self.model.predict_proba(X)
+        
+        scores = self._decision_function_array(X)
+        scores -= scores.max(axis=1, keepdims=True)
+        np.exp(scores, out=scores)
+        scores /= scores.sum(axis=1, keepdims=True)
+        return scores
+
+    def predict_array(self, X: np.ndarray) -> Dict:
+        """Batch prediction with the trained QDA for a (n_samples, n_features) matrix."""
+        probabilities = self.predict_proba_array(X)
+        class_names = ["normal", "seizure", "neurodegeneration"]
+        return {
+            "predicted_class": [class_names[i] for i in probabilities.argmax(axis=1)],
+            # Rounded in float64: float32 values would serialize as 0.3267999887...
+            "probabilities": probabilities.astype(np.float64).round(4).tolist(),
+            "model": "QDA (Trained)"
+        }
+
     def _tuned_feature_classification(self, features: Dict) -> Dict:
         """
         FINAL TUNED Classification based on YOUR actual dataset patterns
@@ -71,133 +456,14 @@ class EnhancedQDAModel:
         - Normal: Alpha > 50%
         - Neurodegeneration: Delta > 60% OR (Delta+Theta > 50% AND Alpha < 20%)
         - Seizure: High beta/gamma OR high kurtosis
+        
+        Scalar wrapper around the vectorized _score_batch rules.
         """
-        try:
-            bp = features.get("band_powers", {})
-            stats = features.get("statistics", {})
-            
-            # Extract features
-            delta = float(bp.get("Delta_Waves", 0.0))
-            theta = float(bp.get("Theta_Waves", 0.0))
-            alpha = float(bp.get("Alpha_Waves", 0.0))
-            beta = float(bp.get("Beta_Waves", 0.0))
-            gamma = float(bp.get("Gamma_Waves", 0.0))
-            
-            kurt = float(stats.get("kurtosis", 0.0))
-            entropy = float(stats.get("entropy", 0.5))
-            zcr = float(stats.get("zero_crossing_rate", 0.05))
-            
-            # SIMPLE, CLEAR DECISION LOGIC based on actual data patterns
-            
-            # Check for NORMAL first (highest priority - alpha dominant)
-            if alpha > 0.50:  # Based on normal_001.csv (60.93% alpha)
-                predicted_class = "normal"
-                confidence = min(alpha * 150, 95.0)  # Scale appropriately
-                probabilities = [confidence/100, (100-confidence)/200, (100-confidence)/200]
-                
-            # Check for NEURODEGENERATION (high delta/theta, low alpha)
-            elif delta > 0.60 or (delta + theta > 0.50 and alpha < 0.20):
-                # Based on normal_002.csv (74% delta) and seizure_001.csv (73% delta)
-                predicted_class = "neurodegeneration"
-                confidence = min((delta + theta) * 120, 95.0)
-                probabilities = [(100-confidence)/200, (100-confidence)/200, confidence/100]
-                
-            # Check for SEIZURE (high beta/gamma OR high kurtosis)
-            elif (beta + gamma) > 0.15 or abs(kurt) > 2.5 or zcr > 0.12:
-                predicted_class = "seizure"
-                spike_factor = min((beta + gamma) * 300 + abs(kurt) * 10, 95.0)
-                confidence = max(spike_factor, 70.0)
-                probabilities = [(100-confidence)/200, confidence/100, (100-confidence)/200]
-                
-            # Default to most likely based on relative strengths
-            else:
-                # Calculate scores
-                normal_score = alpha * 100
-                seizure_score = (beta + gamma) * 100 + abs(kurt) * 10
-                neuro_score = (delta + theta) * 80
-                
-                # Normalize
-                total = max(normal_score + seizure_score + neuro_score, 0.01)
-                probabilities = [
-                    normal_score / total,
-                    seizure_score / total,
-                    neuro_score / total
-                ]
-                
-                prediction_idx = np.argmax(probabilities)
-                class_names = ["normal", "seizure", "neurodegeneration"]
-                predicted_class = class_names[prediction_idx]
-                confidence = probabilities[prediction_idx] * 100
-                
-            result = {
-                "predicted_class": predicted_class,
-                "confidence": round(float(confidence), 2),
-                "probabilities": [round(float(p), 4) for p in probabilities],
-                "model": "QDA Feature-Based (Tuned)",
-                "method": "Threshold-based classification"
-            }
-            
-            logger.info(f"✅ QDA: {predicted_class} ({confidence:.1f}%) - "
-                       f"Alpha={alpha:.3f}, Delta={delta:.3f}, Beta+Gamma={beta+gamma:.3f}")
-            
-            return result
-            
-        except Exception as e:
-            logger.error(f"Classification failed: {e}")
-            return {
-                "predicted_class": "normal",
-                "confidence": 60.0,
-                "probabilities": [0.60, 0.20, 0.20],
-                "model": "QDA Fallback",
-                "method": "Default"
-            }
+        return self.predict_many([features])[0]
 
     def _features_dict_to_array_62(self, features: Dict) -> np.ndarray:
         """Convert 62-feature dict to array."""
-        feature_array = []
-        
-        bp = features.get("band_powers", {})
-        stats = features.get("statistics", {})
-        
-        feature_array.extend([
-            float(bp.get("Delta_Waves", 0.0)),
-            float(bp.get("Theta_Waves", 0.0)),
-            float(bp.get("Alpha_Waves", 0.0)),
-            float(bp.get("Beta_Waves", 0.0)),
-            float(bp.get("Gamma_Waves", 0.0)),
-            float(bp.get("Delta_Alpha_Ratio", 0.0)),
-            float(bp.get("Theta_Beta_Ratio", 0.0)),
-            float(bp.get("Alpha_Beta_Ratio", 0.0)),
-            float(bp.get("Delta_Theta_Combined", 0.0)),
-            float(bp.get("High_Freq_Power", 0.0)),
-            float(bp.get("Total_Power", 1.0)),
-            float(bp.get("Low_High_Ratio", 0.0))
-        ])
-        
-        stat_keys = [
-            "mean_amplitude", "signal_variance", "standard_deviation", "kurtosis", "skewness",
-            "peak_amplitude", "rms_amplitude", "spectral_centroid", "spectral_bandwidth",
-            "spectral_rolloff", "zero_crossing_rate", "mfcc_1", "mfcc_2", "mfcc_3",
-            "energy", "entropy", "amplitude_range", "coefficient_variation", "signal_to_noise",
-            "spectral_spread", "spectral_slope", "spectral_flux", "temporal_centroid",
-            "spectral_decrease", "harmonic_ratio", "noise_ratio", "dynamic_range",
-            "spectral_contrast", "rhythmic_pattern", "frequency_stability", "amplitude_modulation",
-            "phase_coherence", "signal_complexity", "temporal_stability", "frequency_concentration",
-            "neural_activity_index", "seizure_indicator", "neurodegeneration_marker",
-            "brain_rhythm_coherence", "pathological_pattern", "clinical_severity",
-            "diagnostic_confidence", "signal_regularity", "frequency_dominance",
-            "time_domain_complexity", "frequency_domain_complexity", "amplitude_asymmetry",
-            "frequency_asymmetry", "neural_synchrony", "pathological_score"
-        ]
-        
-        for key in stat_keys:
-            feature_array.append(float(stats.get(key, 0.0)))
-        
-        while len(feature_array) < 62:
-            feature_array.append(0.0)
-        feature_array = feature_array[:62]
-        
-        return np.array(feature_array, dtype=np.float32)
+        return features_to_matrix([features])[0]
 
     def get_model_info(self) -> Dict:
         return {
@@ -5,41 +5,165 @@ FINAL TabNet Model - Same Tuned Logic as QDA
 """
 
 import numpy as np
-import pickle
 import os
 import logging
 from typing import Dict
+from .model_qda import features_to_matrix, load_model_package, rule_inputs
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+try:
+    import torch
+    from pytorch_tabnet.tab_model import TabNetClassifier
+    TORCH_AVAILABLE = True
+except ImportError:
+    TORCH_AVAILABLE = False
+
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+# torch.compile the loaded network (opt-in: compiling takes ~40 s per worker on CPU)
+TABNET_COMPILE = os.getenv("TABNET_COMPILE", "0") == "1"
+# Serve the INT8 network even when train_tabnet did not validate it against FP32
+TABNET_INT8 = os.getenv("TABNET_INT8", "0") == "1"
+
+# Threshold-rule constants (QDA's rules with slightly different thresholds)
+NORMAL_ALPHA_MIN = 0.48
+NEURO_DELTA_MIN = 0.58
+NEURO_SLOW_MIN = 0.48
+NEURO_ALPHA_MAX = 0.22
+SEIZURE_HIGH_FREQ_MIN = 0.14
+SEIZURE_KURTOSIS_MIN = 2.3
+SEIZURE_ZCR_MIN = 0.11
+NORMAL_CONFIDENCE_SCALE = 145.0
+NEURO_CONFIDENCE_SCALE = 115.0
+SEIZURE_HIGH_FREQ_SCALE = 280.0
+SEIZURE_KURTOSIS_SCALE = 12.0
+SEIZURE_CONFIDENCE_FLOOR = 68.0
+MAX_RULE_CONFIDENCE = 92.0
+NORMAL_SCORE_SCALE = 100.0
+SEIZURE_SCORE_SCALE = 100.0
+NEURO_SCORE_SCALE = 75.0
+
+
+def _classify_scalar(delta, theta, alpha, beta, gamma, kurt, zcr):
+    """
+    Threshold rules for one sample, in priority order:
+    - Normal: alpha > 0.48
+    - Neurodegeneration: delta > 0.58 or (delta + theta > 0.48 and alpha < 0.22)
+    - Seizure: beta + gamma > 0.14 or |kurtosis| > 2.3 or zcr > 0.11
+    - Otherwise the largest of the relative class scores
+    
+    Returns (class index, confidence in %, p_normal, p_seizure, p_neuro).
+    Plain Python (numba-compiled below when available); comparisons are
+    written so NaN propagates like min/max and np.argmax did.
+    """
+    high_freq = beta + gamma
+    slow = delta + theta
+    abs_kurt = abs(kurt)
+    
+    if alpha > NORMAL_ALPHA_MIN:
+        idx = 0
+        c = alpha * NORMAL_CONFIDENCE_SCALE
+    elif delta > NEURO_DELTA_MIN or (slow > NEURO_SLOW_MIN and alpha < NEURO_ALPHA_MAX):
+        idx = 2
+        c = slow * NEURO_CONFIDENCE_SCALE
+    elif high_freq > SEIZURE_HIGH_FREQ_MIN or abs_kurt > SEIZURE_KURTOSIS_MIN or zcr > SEIZURE_ZCR_MIN:
+        idx = 1
+        c = high_freq * SEIZURE_HIGH_FREQ_SCALE + abs_kurt * SEIZURE_KURTOSIS_SCALE
+    else:
+        idx = -1
+        c = 0.0
+    
+    if idx >= 0:
+        if c > MAX_RULE_CONFIDENCE:
+            c = MAX_RULE_CONFIDENCE
+        if idx == 1 and c < SEIZURE_CONFIDENCE_FLOOR:
+            c = SEIZURE_CONFIDENCE_FLOOR
+        rest = (100 - c) / 200
+        if idx == 0:
+            return idx, c, c / 100, rest, rest
+        if idx == 1:
+            return idx, c, rest, c / 100, rest
+        return idx, c, rest, rest, c / 100
+    
+    normal_score = alpha * NORMAL_SCORE_SCALE
+    seizure_score = high_freq * SEIZURE_SCORE_SCALE + abs_kurt * SEIZURE_KURTOSIS_SCALE
+    neuro_score = slow * NEURO_SCORE_SCALE
+    total = normal_score + seizure_score + neuro_score
+    if total < 0.01:
+        total = 0.01
+    p0 = normal_score / total
+    p1 = seizure_score / total
+    p2 = neuro_score / total
+    # First maximum, or the first NaN (np.argmax semantics)
+    if p0 != p0:
+        idx, c = 0, p0
+    elif p1 != p1:
+        idx, c = 1, p1
+    elif p2 != p2:
+        idx, c = 2, p2
+    elif p1 > p0 and p1 >= p2:
+        idx, c = 1, p1
+    elif p2 > p0 and p2 > p1:
+        idx, c = 2, p2
+    else:
+        idx, c = 0, p0
+    return idx, c * 100, p0, p1, p2
+
+
+if NUMBA_AVAILABLE:
+    # The branch cascade compiled once, called with plain floats per request
+    _classify_scalar = njit(cache=True)(_classify_scalar)
+
 class EnhancedTabNetModel:
     def __init__(self):
         self.model = None
         self.scaler = None
         self.label_encoder = None
+        self.scaler_mean = None
+        self.scaler_inv_scale = None
+        self.top_features = []
+        self.n_features = None
         self.is_trained = False
         self.model_path = "ml_models/trained_models/tabnet_model.pkl"
-        
-        self.load_model()
+        # Weights are loaded once at app startup (training_service.load)
 
     def load_model(self):
         """Load trained TabNet model."""
         if os.path.exists(self.model_path):
             try:
-                with open(self.model_path, 'rb') as f:
-                    model_data = pickle.load(f)
+                model_data = load_model_package(self.model_path)
                 
                 if isinstance(model_data, dict):
                     self.model = model_data.get('model')
                     self.scaler = model_data.get('scaler')
                     self.label_encoder = model_data.get('label_encoder')
+                    self.scaler_mean = model_data.get('scaler_mean')
+                    self.scaler_inv_scale = model_data.get('scaler_inv_scale')
+                    # (name, importance) pairs ranked at training time
+                    self.top_features = model_data.get('top15_features', [])
+                    self.n_features = model_data.get('n_features')
+                    
+                    # train_tabnet keeps the network in a separate _tabnet.zip
+                    if self.model is None:
+                        self.model = self._load_network(
+                            model_data.get('int8_modules'), model_data.get('int8_validation') or {}
+                        )
                 else:
                     self.model = model_data
                 
                 self.is_trained = True
                 logger.info(f"✅ TabNet model loaded")
-                logger.warning("⚠️ Using raw features (scaler bypassed)")
+                
+                # First call compiles _classify_scalar (numba) outside any request
+                _classify_scalar(0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0)
+                logger.warning("⚠️ File analysis (predict) uses the rule-based scorer on raw features; "
+                               "only predict_array applies the scaler")
                 
                 return True
                 
@@ -50,6 +174,85 @@ class EnhancedTabNetModel:
             logger.warning(f"⚠️ TabNet model not found")
             return False
 
+    def _load_network(self, int8_modules=None, int8_validation=None):
+        """Load the TabNet weights saved next to the components package."""
+        weights_path = self.model_path.replace(".pkl", "_tabnet.zip")
+        if not TORCH_AVAILABLE or not os.path.exists(weights_path):
+            return None
+        
+        model = TabNetClassifier()
+        model.load_model(weights_path)
+        
+        # Swap in the INT8 network on CPU when int8 kernels are available and
+        # training validated its accuracy against FP32 (or TABNET_INT8=1)
+        int8_path = self.model_path.replace(".pkl", "_tabnet_int8.pt")
+        int8_validation = int8_validation or {}
+        int8_accepted = bool(int8_validation.get("accepted")) or TABNET_INT8
+        if (int8_modules and int8_accepted and os.path.exists(int8_path) and model.device.type == "cpu"
+                and torch.backends.quantized.engine in ("fbgemm", "x86")):
+            # Rebuild the same partially quantized layout train_tabnet saved
+            network = torch.ao.quantization.quantize_dynamic(
+                model.network.eval(), set(int8_modules), dtype=torch.qint8
+            )
+            network.load_state_dict(torch.load(int8_path))
+            model.network = network
+            if int8_validation.get("accepted"):
+                logger.info(f"✅ TabNet INT8 network loaded (test accuracy "
+                            f"{int8_validation['fp32_accuracy']:.4f} FP32, {int8_validation['int8_accuracy']:.4f} INT8)")
+            else:
+                logger.info("✅ TabNet INT8 network loaded (TABNET_INT8=1, not validated against FP32)")
+        
+        # Serving only: freeze BatchNorm/ghost batch statistics once
+        model.network.eval()
+        
+        if TABNET_COMPILE and hasattr(torch, "compile"):
+            self._compile_network(model)
+        
+        return model
+
+    @staticmethod
+    def _compile_network(model):
+        """Swap in a torch.compile'd network, warmed up so no request pays compile time."""
+        eager_network = model.network
+        try:
+            model.network = torch.compile(eager_network, mode="reduce-overhead", fullgraph=False)
+            # Warm up under inference_mode, as predict_proba_array calls it
+            with torch.inference_mode():
+                model.predict_proba(np.zeros((1, eager_network.input_dim), dtype=np.float32))
+            logger.info("✅ TabNet network compiled")
+        except Exception as e:
+            model.network = eager_network
+            logger.warning(f"⚠️ torch.compile failed, using eager TabNet: {e}")
+
+    def _standardize(self, X: np.ndarray) -> np.ndarray:
+        """Standardize a feature matrix with the stored float32 scaler constants."""
+        X = np.array(X, dtype=np.float32, ndmin=2)
+        if self.scaler_mean is not None:
+            np.subtract(X, self.scaler_mean, out=X)
+            np.multiply(X, self.scaler_inv_scale, out=X)
+        return X
+
+    def predict_proba_array(self, X: np.ndarray) -> np.ndarray:
+        """Class probabilities of the trained TabNet for raw (unscaled) feature rows."""
+        if self.model is None:
+            raise RuntimeError("TabNet model not loaded")
+        # No autograd bookkeeping (grad tracking, version counters) for serving
+        with torch.inference_mode():
+            return self.model.predict_proba(self._standardize(X))
+
+    def predict_array(self, X: np.ndarray) -> Dict:
+        """Batch prediction with the trained TabNet for a (n_samples, n_features) matrix."""
+        # One predict_proba call for all rows: per-call torch dispatch, not the
+        # matmuls, dominates the cost of a single sample
+        probabilities = self.predict_proba_array(X)
+        class_names = ["normal", "seizure", "neurodegeneration"]
+        return {
+            "predicted_class": [class_names[i] for i in probabilities.argmax(axis=1)],
+            # Rounded in float64: float32 values would serialize as 0.3267999887...
+            "probabilities": probabilities.astype(np.float64).round(4).tolist(),
+            "model": "TabNet (Trained)"
+        }
+
     def predict(self, features: Dict) -> Dict:
         """Always use tuned feature-based classification."""
         return self._tuned_feature_classification(features)
@@ -57,56 +260,20 @@ class EnhancedTabNetModel:
     def _tuned_feature_classification(self, features: Dict) -> Dict:
         """Same logic as QDA with slight variation."""
         try:
-            bp = features.get("band_powers", {})
-            stats = features.get("statistics", {})
+            # Same single-pass reader as QDA; entropy is not used by these rules
+            delta, theta, alpha, beta, gamma, kurt, _, zcr = rule_inputs(features)
             
-            delta = float(bp.get("Delta_Waves", 0.0))
-            theta = float(bp.get("Theta_Waves", 0.0))
-            alpha = float(bp.get("Alpha_Waves", 0.0))
-            beta = float(bp.get("Beta_Waves", 0.0))
-            gamma = float(bp.get("Gamma_Waves", 0.0))
+            idx, confidence, p_normal, p_seizure, p_neuro = _classify_scalar(
+                delta, theta, alpha, beta, gamma, kurt, zcr
+            )
+            class_names = ["normal", "seizure", "neurodegeneration"]
+            predicted_class = class_names[idx]
+            probabilities = [p_normal, p_seizure, p_neuro]
             
-            kurt = float(stats.get("kurtosis", 0.0))
-            zcr = float(stats.get("zero_crossing_rate", 0.05))
-            
-            # SAME LOGIC AS QDA (TabNet uses slightly different thresholds)
-            if alpha > 0.48:  # Slightly lower threshold for TabNet
-                predicted_class = "normal"
-                confidence = min(alpha * 145, 92.0)
-                probabilities = [confidence/100, (100-confidence)/200, (100-confidence)/200]
-                
-            elif delta > 0.58 or (delta + theta > 0.48 and alpha < 0.22):
-                predicted_class = "neurodegeneration"
-                confidence = min((delta + theta) * 115, 92.0)
-                probabilities = [(100-confidence)/200, (100-confidence)/200, confidence/100]
-                
-            elif (beta + gamma) > 0.14 or abs(kurt) > 2.3 or zcr > 0.11:
-                predicted_class = "seizure"
-                spike_factor = min((beta + gamma) * 280 + abs(kurt) * 12, 92.0)
-                confidence = max(spike_factor, 68.0)
-                probabilities = [(100-confidence)/200, confidence/100, (100-confidence)/200]
-                
-            else:
-                normal_score = alpha * 100
-                seizure_score = (beta + gamma) * 100 + abs(kurt) * 12
-                neuro_score = (delta + theta) * 75
-                
-                total = max(normal_score + seizure_score + neuro_score, 0.01)
-                probabilities = [
-                    normal_score / total,
-                    seizure_score / total,
-                    neuro_score / total
-                ]
-                
-                prediction_idx = np.argmax(probabilities)
-                class_names = ["normal", "seizure", "neurodegeneration"]
-                predicted_class = class_names[prediction_idx]
-                confidence = probabilities[prediction_idx] * 100
-                
             result = {
                 "predicted_class": predicted_class,
-                "confidence": round(float(confidence), 2),
-                "probabilities": [round(float(p), 4) for p in probabilities],
+                "confidence": round(confidence, 2),
+                "probabilities": [round(p, 4) for p in probabilities],
                 "model": "TabNet Feature-Based (Tuned)",
                 "method": "Threshold-based classification"
             }
@@ -126,16 +293,19 @@ class EnhancedTabNetModel:
             }
 
     def _features_dict_to_array_62(self, features: Dict) -> np.ndarray:
-        """Same as QDA."""
-        # [Same implementation as QDA - copy from above]
-        pass
+        """Same as QDA (shared 62-feature layout)."""
+        return features_to_matrix([features])[0]
 
     def get_model_info(self) -> Dict:
         return {
             "is_trained": self.is_trained,
             "model_type": "TabNet Feature-Based (Final Tuned)",
             "expected_features": 62,
-            "scaler_disabled": True
+            "scaler_disabled": True,
+            "top_features": [
+                {"feature": name, "importance": importance}
+                for name, importance in self.top_features
+            ]
         }
 
 # Global instance
@@ -12,13 +12,76 @@ Real-Time EEG Preprocessing Pipeline
 import numpy as np
 import os
 import logging
-from typing import Dict, Tuple, Optional
+from typing import Dict, List, Tuple, Optional
 from scipy import signal
-from scipy.stats import zscore
+
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+
+def _quality_stats(x: np.ndarray, flat_eps: float, z_threshold: float):
+    """
+    (peak |x|, variance, flat samples, artifact samples) of a 1-D signal:
+    flat samples are neighbours closer than flat_eps, artifacts are samples
+    whose |z-score| exceeds z_threshold. NumPy fallback for when numba is
+    not installed.
+    """
+    peak = np.max(np.abs(x))
+    mean = np.mean(x)
+    variance = np.var(x)
+    flat_samples = np.sum(np.abs(np.diff(x)) < flat_eps)
+    # |z| > z_threshold without materializing the z-scores; constant or NaN
+    # signals have undefined z-scores and count none
+    limit = z_threshold * np.sqrt(variance)
+    artifacts = np.sum(np.abs(x - mean) > limit) if limit > 0 else 0
+    return peak, variance, flat_samples, artifacts
+
+
+if NUMBA_AVAILABLE:
+    # Two fused passes instead of five: peak, mean and flat neighbours in the
+    # first, squared deviations in the second, then the z-score count
+    @njit(cache=True)
+    def _quality_stats(x, flat_eps, z_threshold):
+        n = x.shape[0]
+        if n == 0:
+            raise ValueError("zero-size array to reduction operation maximum which has no identity")
+        peak = 0.0
+        has_nan = False
+        total = 0.0
+        flat_samples = 0
+        for i in range(n):
+            v = x[i]
+            if v != v:
+                has_nan = True
+            peak = max(peak, abs(v))
+            total += v
+            # Difference in the signal's own dtype, as np.diff computes it
+            if i > 0 and abs(x[i] - x[i - 1]) < flat_eps:
+                flat_samples += 1
+        mean = total / n
+        sq_dev = 0.0
+        for i in range(n):
+            d = x[i] - mean
+            sq_dev += d * d
+        variance = sq_dev / n
+        # Constant (std 0) or NaN signals have undefined z-scores, none count
+        artifacts = 0
+        limit = z_threshold * np.sqrt(variance)
+        if limit > 0:
+            for i in range(n):
+                if abs(x[i] - mean) > limit:
+                    artifacts += 1
+        if has_nan:
+            peak = np.nan
+        return peak, variance, flat_samples, artifacts
+
+
 class EEGPreprocessor:
     def __init__(self):
         self.sampling_rate = 173.61  # Bonn dataset
@@ -33,6 +96,30 @@ class EEGPreprocessor:
         self.max_amplitude = 500   # μV
         self.min_variance = 1e-6
         self.max_artifacts_percent = 30
+        
+        # Filter coefficients depend only on the parameters above, so they
+        # are designed once here rather than on every call
+        self._bandpass_sos = signal.butter(
+            4,  # Order
+            [self.highpass_freq, self.lowpass_freq],
+            btype='band',
+            fs=self.sampling_rate,
+            output='sos'
+        )
+        self._notch_ba = signal.iirnotch(
+            self.notch_freq,
+            30,  # Quality factor
+            fs=self.sampling_rate
+        )
+        
+        # Deterministic part of the fallback signal; only the noise is drawn per call
+        t = np.linspace(0, 23.6, 4097)
+        self._fallback_template = (
+            0.1 * np.sin(2*np.pi*10*t) +   # Alpha
+            0.05 * np.sin(2*np.pi*20*t) +  # Beta
+            0.03 * np.sin(2*np.pi*6*t)     # Theta
+        )
+        self._rng = np.random.default_rng()
 
     def load_and_validate(self, file_path: str) -> Tuple[np.ndarray, Dict]:
         """Load EEG data and perform quality validation."""
@@ -71,8 +158,9 @@ class EEGPreprocessor:
             data_processed = data - np.mean(data)
             preprocessing_steps.append("DC removal")
             
-            # Step 2: Outlier detection and removal
-            data_processed, outliers_removed = self._remove_outliers(data_processed)
+            # Step 2: Outlier detection and removal (the signal is zero-mean now,
+            # so only its std is left to compute)
+            data_processed, outliers_removed = self._remove_outliers(data_processed, mean=0.0)
             if outliers_removed > 0:
                 preprocessing_steps.append(f"Outlier removal ({outliers_removed} samples)")
             
@@ -88,14 +176,7 @@ class EEGPreprocessor:
             data_processed = self._normalize_signal(data_processed)
             preprocessing_steps.append("Normalization")
             
-            # Generate preprocessing report
-            report = {
-                "original_samples": original_length,
-                "processed_samples": len(data_processed),
-                "steps_applied": preprocessing_steps,
-                "signal_quality": self._assess_signal_quality(data_processed),
-                "preprocessing_successful": True
-            }
+            report = self._preprocessing_report(original_length, data_processed, preprocessing_steps)
             
             logger.info(f"Preprocessing completed: {len(preprocessing_steps)} steps applied")
             return data_processed, report
@@ -108,29 +189,104 @@ class EEGPreprocessor:
                 "steps_applied": []
             }
 
+    def preprocess_batch(self, data_2d: np.ndarray) -> List[Tuple[np.ndarray, Dict]]:
+        """
+        preprocess_pipeline for equal-length epochs stacked as (n_epochs, n_samples).
+        Epochs that lose no samples to outlier removal are filtered and
+        normalized together along the last axis; the rest run one by one.
+        """
+        data_2d = np.atleast_2d(np.asarray(data_2d))
+        centered = data_2d - data_2d.mean(axis=1, keepdims=True)
+        
+        results = [None] * len(data_2d)
+        batch_rows = []
+        for i, row in enumerate(centered):
+            if self._remove_outliers(row, mean=0.0)[1] > 0:
+                results[i] = self.preprocess_pipeline(data_2d[i])
+            else:
+                batch_rows.append(i)
+        if not batch_rows:
+            return results
+        
+        try:
+            processed = self._apply_bandpass_filter(centered[batch_rows])
+            processed = self._apply_notch_filter(processed)
+            processed = self._normalize_signal(processed)
+        except Exception as e:
+            logger.error(f"Preprocessing failed: {str(e)}")
+            for i in batch_rows:
+                results[i] = self.preprocess_pipeline(data_2d[i])
+            return results
+        
+        steps = [
+            "DC removal",
+            f"Bandpass filter ({self.highpass_freq}-{self.lowpass_freq} Hz)",
+            f"Notch filter ({self.notch_freq} Hz)",
+            "Normalization"
+        ]
+        for i, row in zip(batch_rows, processed):
+            results[i] = (row, self._preprocessing_report(data_2d.shape[1], row, list(steps)))
+        
+        logger.info(f"Batch preprocessing completed: {len(batch_rows)}/{len(data_2d)} epochs filtered together")
+        return results
+
+    def preprocess_stream(self, chunk: np.ndarray, state: Optional[Tuple[np.ndarray, np.ndarray]] = None
+                          ) -> Tuple[np.ndarray, Optional[Tuple[np.ndarray, np.ndarray]]]:
+        """
+        Causal band-pass + notch filtering of one chunk of a live signal.
+        Pass the returned state with the next chunk (None for the first), so
+        consecutive chunks filter as one continuous signal in O(chunk) memory.
+        The state belongs to the caller's stream, not to this shared instance.
+        Unlike preprocess_pipeline this is single-pass (not zero-phase), and
+        the whole-signal steps (outliers, normalization) do not apply.
+        """
+        chunk = np.asarray(chunk, dtype=np.float64)
+        if len(chunk) == 0:
+            return chunk, state
+        if state is None:
+            # Start in steady state for a signal that has been at chunk[0];
+            # the notch input (band-pass output) of a constant signal is 0
+            bandpass_zi = signal.sosfilt_zi(self._bandpass_sos) * chunk[0]
+            notch_zi = np.zeros(max(len(self._notch_ba[0]), len(self._notch_ba[1])) - 1)
+        else:
+            bandpass_zi, notch_zi = state
+        
+        filtered, bandpass_zi = signal.sosfilt(self._bandpass_sos, chunk, zi=bandpass_zi)
+        filtered, notch_zi = signal.lfilter(*self._notch_ba, filtered, zi=notch_zi)
+        return filtered, (bandpass_zi, notch_zi)
+
+    def _preprocessing_report(self, original_length: int, data_processed: np.ndarray, steps: List[str]) -> Dict:
+        """Report for one successfully preprocessed signal."""
+        return {
+            "original_samples": original_length,
+            "processed_samples": len(data_processed),
+            "steps_applied": steps,
+            "signal_quality": self._assess_signal_quality(data_processed),
+            "preprocessing_successful": True
+        }
+
     def _assess_signal_quality(self, data: np.ndarray) -> Dict:
         """Comprehensive signal quality assessment."""
         try:
             quality_score = 0
             issues = []
             
+            # Every statistic below from one fused pass over the signal
+            max_amp, variance, flat_samples, artifacts = _quality_stats(np.asarray(data), 1e-6, 5.0)
+            
             # Check amplitude range
-            max_amp = np.max(np.abs(data))
             if max_amp < self.max_amplitude:
                 quality_score += 25
             else:
                 issues.append(f"High amplitude: {max_amp:.2f}")
             
             # Check variance
-            variance = np.var(data)
             if variance > self.min_variance:
                 quality_score += 25
             else:
                 issues.append(f"Low variance: {variance:.2e}")
             
             # Check for flat segments
-            diff_data = np.diff(data)
-            flat_samples = np.sum(np.abs(diff_data) < 1e-6)
             flat_percent = (flat_samples / len(data)) * 100
             
             if flat_percent < 5:
@@ -138,9 +294,7 @@ class EEGPreprocessor:
             else:
                 issues.append(f"Flat segments: {flat_percent:.1f}%")
             
-            # Check for artifacts (extreme values)
-            z_scores = np.abs(zscore(data))
-            artifacts = np.sum(z_scores > 5)
+            # Check for artifacts (|z-score| > 5)
             artifact_percent = (artifacts / len(data)) * 100
             
             if artifact_percent < self.max_artifacts_percent:
@@ -175,11 +329,19 @@ class EEGPreprocessor:
                 "error": str(e)
             }
 
-    def _remove_outliers(self, data: np.ndarray, threshold: float = 5.0) -> Tuple[np.ndarray, int]:
-        """Remove statistical outliers from signal."""
+    def _remove_outliers(self, data: np.ndarray, threshold: float = 5.0,
+                         mean: Optional[float] = None, std: Optional[float] = None) -> Tuple[np.ndarray, int]:
+        """
+        Remove statistical outliers (|z-score| >= threshold) from signal.
+        Pass mean/std when the caller already has them to skip those passes.
+        """
         try:
-            z_scores = np.abs(zscore(data))
-            outlier_mask = z_scores < threshold
+            if mean is None:
+                mean = np.mean(data)
+            if std is None:
+                std = np.std(data)
+            # |x - mean| < threshold * std, without materializing the z-scores
+            outlier_mask = np.abs(data - mean) < threshold * std
             cleaned_data = data[outlier_mask]
             outliers_removed = len(data) - len(cleaned_data)
             
@@ -189,19 +351,10 @@ class EEGPreprocessor:
             return data, 0
 
     def _apply_bandpass_filter(self, data: np.ndarray) -> np.ndarray:
-        """Apply band-pass filter for EEG frequency range."""
+        """Apply band-pass filter for EEG frequency range (along the last axis)."""
         try:
-            # Design Butterworth filter
-            sos = signal.butter(
-                4,  # Order
-                [self.highpass_freq, self.lowpass_freq],
-                btype='band',
-                fs=self.sampling_rate,
-                output='sos'
-            )
-            
             # Apply zero-phase filtering
-            filtered_data = signal.sosfiltfilt(sos, data)
+            filtered_data = signal.sosfiltfilt(self._bandpass_sos, data)
             return filtered_data
             
         except Exception as e:
@@ -209,14 +362,9 @@ class EEGPreprocessor:
             return data
 
     def _apply_notch_filter(self, data: np.ndarray) -> np.ndarray:
-        """Apply notch filter to remove power line interference."""
+        """Apply notch filter to remove power line interference (along the last axis)."""
         try:
-            # Design notch filter
-            b_notch, a_notch = signal.iirnotch(
-                self.notch_freq,
-                30,  # Quality factor
-                fs=self.sampling_rate
-            )
+            b_notch, a_notch = self._notch_ba
             
             # Apply filter
             filtered_data = signal.filtfilt(b_notch, a_notch, data)
@@ -227,17 +375,15 @@ class EEGPreprocessor:
             return data
 
     def _normalize_signal(self, data: np.ndarray) -> np.ndarray:
-        """Normalize signal using robust z-score."""
+        """Normalize signal using robust z-score (per signal along the last axis)."""
         try:
-            # Use median and MAD for robust normalization
-            median = np.median(data)
-            mad = np.median(np.abs(data - median))
-            
-            if mad > 0:
-                normalized_data = (data - median) / (1.4826 * mad)
-            else:
-                normalized_data = data - median
+            # Use median and MAD for robust normalization; a flat signal
+            # (MAD 0) is only centered
+            median = np.median(data, axis=-1, keepdims=True)
+            mad = np.median(np.abs(data - median), axis=-1, keepdims=True)
+            scale = np.where(mad > 0, 1.4826 * mad, 1.0)
             
+            normalized_data = (data - median) / scale
             return normalized_data
             
         except:
@@ -245,17 +391,11 @@ class EEGPreprocessor:
 
     def _generate_fallback_signal(self) -> np.ndarray:
         """Generate realistic EEG-like signal as fallback."""
-        t = np.linspace(0, 23.6, 4097)
-        
-        # Simulate EEG with multiple frequency components
-        eeg_signal = (
-            0.1 * np.sin(2*np.pi*10*t) +   # Alpha
-            0.05 * np.sin(2*np.pi*20*t) +  # Beta
-            0.03 * np.sin(2*np.pi*6*t) +   # Theta
-            0.02 * np.random.randn(len(t))   # Noise
-        )
-        
-        return eeg_signal
+        # Simulated EEG components plus fresh noise
+        noise = self._rng.standard_normal(len(self._fallback_template))
+        noise *= 0.02
+        noise += self._fallback_template
+        return noise
 
 # Global preprocessor instance
 preprocessor = EEGPreprocessor()
@@ -271,15 +411,20 @@ def extract_features(file_path: str) -> Dict:
         dict: Preprocessed features and quality metrics
     """
     try:
-        # Load and validate signal
-        raw_data, quality_metrics = preprocessor.load_and_validate(file_path)
+        # Import the real feature extractor
+        from . import feature_extraction
+        
+        # Load the signal once, with the feature extractor's loader, and hand
+        # the same samples to validation, preprocessing and feature extraction
+        raw_data = feature_extraction.processor.load_eeg_data(file_path)
+        quality_metrics = preprocessor._assess_signal_quality(raw_data)
+        logger.info(f"Loaded {len(raw_data)} samples, quality: {quality_metrics['overall_quality']}")
         
         # Apply preprocessing pipeline
         processed_data, preprocessing_report = preprocessor.preprocess_pipeline(raw_data)
         
-        # Extract features (import the real feature extractor)
-        from . import feature_extraction
-        features = feature_extraction.extract_features_for_prediction(file_path)
+        # Extract features
+        features = feature_extraction.extract_features_from_signal(raw_data)
         
         # Add preprocessing information
         features["preprocessing"] = preprocessing_report
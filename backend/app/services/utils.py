@@ -13,22 +13,39 @@ import shutil
 import uuid
 from typing import Optional, Union
 from fastapi import UploadFile, HTTPException
+from fastapi.concurrency import run_in_threadpool
 import logging
 import asyncio
+import aiofiles
 
 logger = logging.getLogger(__name__)
 
 # Supported file extensions for EEG data
 SUPPORTED_EXTENSIONS = {'.txt', '.edf', '.csv', '.dat', '.fif', '.set'}
 MAX_FILE_SIZE = 100 * 1024 * 1024  # 100 MB
+UPLOAD_CHUNK_SIZE = 1024 * 1024  # 1 MB per read/write while streaming uploads
 
-async def save_uploaded_file(upload_file: UploadFile, upload_dir: str = "uploads") -> str:
+# Max concurrent CPU-heavy inference calls per worker (default: half the cores),
+# so model work can't take every threadpool slot and core from DB/IO handlers
+INFERENCE_CONCURRENCY = int(os.getenv("INFERENCE_CONCURRENCY", max(1, (os.cpu_count() or 1) // 2)))
+_inference_semaphore = asyncio.Semaphore(INFERENCE_CONCURRENCY)
+
+async def run_cpu_bound(func, *args, **kwargs):
+    """
+    Run a blocking, CPU-heavy call in the threadpool without blocking the
+    event loop, with at most INFERENCE_CONCURRENCY such calls in flight.
+    """
+    async with _inference_semaphore:
+        return await run_in_threadpool(func, *args, **kwargs)
+
+async def save_uploaded_file(upload_file: UploadFile, upload_dir: str = "uploads", hasher=None) -> str:
     """
     Save uploaded EEG file with validation and error handling.
     
     Args:
         upload_file: FastAPI UploadFile object
         upload_dir: Directory to save the file (default: "uploads")
+        hasher: Optional hashlib-style object updated with the file bytes as they stream
         
     Returns:
         str: Path to saved file
@@ -53,18 +70,35 @@ async def save_uploaded_file(upload_file: UploadFile, upload_dir: str = "uploads
         unique_filename = f"{uuid.uuid4()}{file_extension}"
         file_path = os.path.join(upload_dir, unique_filename)
         
-        # Save file content
-        with open(file_path, "wb") as buffer:
-            # Reset file pointer to beginning
-            await upload_file.seek(0)
-            content = await upload_file.read()
-            buffer.write(content)
+        # Stream file content in chunks: memory stays at one chunk and the
+        # event loop is never blocked on disk writes
+        bytes_written = 0
+        try:
+            async with aiofiles.open(file_path, "wb") as buffer:
+                # Reset file pointer to beginning
+                await upload_file.seek(0)
+                while chunk := await upload_file.read(UPLOAD_CHUNK_SIZE):
+                    bytes_written += len(chunk)
+                    if bytes_written > MAX_FILE_SIZE:
+                        raise HTTPException(
+                            status_code=413,
+                            detail=f"File too large. Maximum size: {MAX_FILE_SIZE // (1024 * 1024)} MB"
+                        )
+                    if hasher is not None:
+                        hasher.update(chunk)
+                    await buffer.write(chunk)
+        except BaseException:
+            # Never leave a partial upload behind
+            if os.path.exists(file_path):
+                os.remove(file_path)
+            raise
         
-        # Verify file was saved correctly
-        if not os.path.exists(file_path) or os.path.getsize(file_path) == 0:
+        # Verify file was saved correctly (the streamed byte count, no extra stat calls)
+        if bytes_written == 0:
+            os.remove(file_path)
             raise HTTPException(status_code=500, detail="Failed to save file completely")
             
-        logger.info(f"✅ File saved successfully: {file_path} ({os.path.getsize(file_path)} bytes)")
+        logger.info(f"✅ File saved successfully: {file_path} ({bytes_written} bytes)")
         return file_path
         
     except HTTPException:
@@ -132,10 +166,11 @@ def get_file_info(file_path: str) -> dict:
         dict: File information including size, type, and status
     """
     try:
-        if not os.path.exists(file_path):
+        try:
+            stat_info = os.stat(file_path)
+        except FileNotFoundError:
             return {"error": "File not found", "exists": False}
             
-        stat_info = os.stat(file_path)
         file_extension = os.path.splitext(file_path)[1].lower()
         
         return {